@@ -0,0 +1,98 @@
+import argparse
+import random
+import string
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from server.count_changes import count_changes, numpy  # noqa: E402
+
+
+def count_changes_zip(before: str, after: str) -> int:
+    changes = 0
+
+    for b, a in zip(before, after):
+        if b != a:
+            changes += 1
+
+    return changes + abs(len(before) - len(after))
+
+
+def memcmp(before: str, after: str) -> bool:
+    return before == after
+
+
+def best_of(repeat: int, function, *args) -> float:
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def make_pair(rng: random.Random, size: int, alphabet: str) -> tuple:
+    before = "".join(rng.choices(alphabet, k=size))
+    after = list(before)
+
+    for index in rng.sample(range(size), max(1, size // 100)):
+        after[index] = rng.choice(alphabet)
+
+    return before, "".join(after) + "<p>appended</p>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark edit scoring.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1 << 10, 1 << 14, 1 << 18, 1 << 20, 1 << 22]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--unicode", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + " <>/"
+
+    if args.unicode:
+        alphabet += "éü漢字"
+
+    print(f"numpy: {'available' if numpy is not None else 'not installed'}")
+    print(
+        f"{'size':>10} {'zip loop':>12} {'python':>12} {'numpy':>12} {'memcmp':>12}"
+    )
+
+    for size in args.sizes:
+        before, after = make_pair(rng, size, alphabet)
+        copy = "".join(list(before))
+
+        expected = count_changes_zip(before, after)
+
+        assert count_changes(before, after, use_numpy=False) == expected
+        assert count_changes(before, after) == expected
+
+        timings = [
+            best_of(args.repeat, count_changes_zip, before, after),
+            best_of(args.repeat, count_changes, before, after, False),
+            best_of(args.repeat, count_changes, before, after, True)
+            if numpy is not None
+            else None,
+            best_of(args.repeat, memcmp, before, copy),
+        ]
+
+        print(
+            f"{size:>10} "
+            + " ".join(
+                f"{'-':>12}" if t is None else f"{t * 1000:>10.3f}ms" for t in timings
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
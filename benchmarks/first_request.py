@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+ROUTES = ["/", "/login/", "/create-account/", "/search/"]
+
+
+def prepare(directory: str, template_cache: str):
+    os.symlink(path.join(ROOT, "templates"), path.join(directory, "templates"))
+
+    with open(path.join(directory, "config.json"), "w") as file:
+        json.dump(
+            {
+                "PROJECT_NAME": "wiki",
+                "SECRET_KEY": "benchmark",
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path.join(directory, 'wiki.db')}",
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "TEMPLATE_CACHE_DIRECTORY": template_cache,
+                "SCORE_NEEDED": {"CREATE": 0, "REQUEST_ADMINISTRATOR": 0},
+                "LIMITS": {"TITLE": 100, "PASSWORD": 100},
+            },
+            file,
+        )
+
+
+def child(warm: bool):
+    sys.path.insert(0, ROOT)
+
+    start = time.perf_counter()
+
+    import run
+
+    run.upgrade_schema()
+
+    if warm:
+        run.run_app()
+
+    startup = time.perf_counter() - start
+
+    client = run.app.test_client()
+    timings = {}
+
+    for route in ROUTES:
+        start = time.perf_counter()
+        client.get(route)
+        timings[route] = time.perf_counter() - start
+
+    print(json.dumps({"startup": startup, "first_requests": timings}))
+
+
+def spawn(directory: str, warm: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, path.abspath(__file__), "--child", "warm" if warm else "cold"],
+        cwd=directory,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure time to first byte on a fresh worker process."
+    )
+    parser.add_argument("--child", choices=["cold", "warm"], help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        return child(args.child == "warm")
+
+    directory = tempfile.mkdtemp()
+    template_cache = path.join(directory, "cache", "templates")
+
+    prepare(directory, template_cache)
+
+    scenarios = {
+        "lazy compile, empty bytecode cache": (False, True),
+        "lazy compile, warm bytecode cache": (False, False),
+        "startup warmup, warm bytecode cache": (True, False),
+    }
+
+    for name, (warm, clear) in scenarios.items():
+        startups = []
+        first_bytes = []
+
+        for _ in range(args.runs):
+            if clear:
+                shutil.rmtree(template_cache, ignore_errors=True)
+
+            result = spawn(directory, warm)
+
+            startups.append(result["startup"])
+            first_bytes.append(result["first_requests"])
+
+        print(name)
+        print(f"  worker startup: {min(startups) * 1000:8.2f} ms")
+
+        for route in ROUTES:
+            best = min(timings[route] for timings in first_bytes)
+
+            print(f"  first {route:<18} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
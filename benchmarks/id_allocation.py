@@ -0,0 +1,150 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from os import path
+
+from sqlalchemy.exc import IntegrityError
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def write_config(directory: str, database: str):
+    with open(path.join(directory, "config.json"), "w") as file:
+        json.dump(
+            {
+                "PROJECT_NAME": "wiki",
+                "SQLALCHEMY_DATABASE_URI": database,
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}}
+                if database.startswith("sqlite")
+                else {},
+            },
+            file,
+        )
+
+
+def load_server(directory: str):
+    os.chdir(directory)
+    sys.path.insert(0, ROOT)
+
+    from server.models import Log, db
+
+    return Log, db
+
+
+def insert_logs(directory: str, strategy: str, inserts: int, start, results):
+    Log, db = load_server(directory)
+
+    db.session.execute(db.select([db.literal(1)]))
+    db.session.rollback()
+
+    start.wait()
+
+    timestamps = []
+    collisions = 0
+
+    for i in range(inserts):
+        log = Log(0, 0, i, 0, i + 1, 0)
+
+        if strategy == "count":
+            log.id = Log.query.count()
+
+        db.session.add(log)
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+            collisions += 1
+        else:
+            timestamps.append(time.perf_counter())
+
+    results.put((timestamps, collisions))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Insert Log rows from several processes and check for id collisions."
+    )
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--inserts", type=int, default=500)
+    parser.add_argument("--strategy", choices=["autoincrement", "count"], default="autoincrement")
+    parser.add_argument("--database", help="SQLAlchemy URI, defaults to a temporary SQLite file.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = args.database or f"sqlite:///{path.join(directory, 'wiki.db')}"
+
+    write_config(directory, database)
+
+    Log, db = load_server(directory)
+    db.create_all()
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(args.processes + 1)
+    results = context.Queue()
+
+    workers = [
+        context.Process(
+            target=insert_logs,
+            args=(directory, args.strategy, args.inserts, start, results),
+        )
+        for _ in range(args.processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    start.wait()
+    began = time.perf_counter()
+
+    timestamps = []
+    failures = 0
+
+    for _ in workers:
+        worker_timestamps, worker_failures = results.get()
+        timestamps.extend(worker_timestamps)
+        failures += worker_failures
+
+    for worker in workers:
+        worker.join()
+
+    elapsed = max(timestamps) - began if timestamps else 0.0
+
+    rows = Log.query.count()
+    distinct = db.session.query(db.func.count(db.distinct(Log.id))).scalar()
+
+    timestamps.sort()
+    windows = 10
+    window = elapsed / windows if elapsed else 1.0
+    per_window = [0] * windows
+
+    for timestamp in timestamps:
+        per_window[min(int((timestamp - began) / window), windows - 1)] += 1
+
+    print(f"strategy:          {args.strategy}")
+    print(f"processes:         {args.processes}")
+    print(f"attempted inserts: {args.processes * args.inserts}")
+    print(f"committed rows:    {rows} ({distinct} distinct ids)")
+    print(f"failed inserts:    {failures}")
+    print(f"throughput:        {len(timestamps) / elapsed if elapsed else 0:.0f} rows/s")
+    print(
+        "rows/s per tenth:  "
+        + " ".join(f"{count / window:.0f}" for count in per_window)
+    )
+
+    if failures or distinct != rows:
+        print(
+            f"FAIL: {failures} inserts hit an IntegrityError, "
+            f"{rows - distinct} ids are duplicated."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import argparse
+import io
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+ROUTES = ["page", "edit_page", "search_result", "logs", "profile", "login", "upload"]
+PASSWORD = "benchmark-password"
+VOCABULARY = [
+    "".join(random.Random(i).choices(string.ascii_lowercase, k=3 + i % 7))
+    for i in range(5000)
+]
+WORD_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+def write_config(directory: str, database: str, bcrypt_rounds: int):
+    os.symlink(path.join(ROOT, "templates"), path.join(directory, "templates"))
+
+    with open(path.join(directory, "config.json"), "w") as file:
+        json.dump(
+            {
+                "PROJECT_NAME": "wiki",
+                "SECRET_KEY": "benchmark",
+                "SQLALCHEMY_DATABASE_URI": database,
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}}
+                if database.startswith("sqlite")
+                else {},
+                "ITEMS_PER_PAGE": 20,
+                "SCORE_NEEDED": {"CREATE": 0, "REQUEST_ADMINISTRATOR": 0},
+                "REQUEST_TYPES": {"ADMINISTRATOR_APPLICATION": 0},
+                "LIMITS": {
+                    "TITLE": 100,
+                    "CONTENT": 10000000,
+                    "SCORE_NEEDED": 10,
+                    "PASSWORD": 100,
+                },
+                "RATE_LIMITS": {},
+                "BCRYPT_ROUNDS": bcrypt_rounds,
+            },
+            file,
+        )
+
+
+def load_server(directory: str):
+    os.chdir(directory)
+    sys.path.insert(0, ROOT)
+
+    import run
+
+    return run
+
+
+def random_words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, WORD_WEIGHTS, k=count))
+
+
+def random_content(rng: random.Random, size: int) -> str:
+    paragraphs = []
+    length = 0
+
+    while length < size:
+        paragraph = f"<p>{random_words(rng, rng.randint(20, 80))}</p>\n"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+
+    return "".join(paragraphs)
+
+
+def seed(args, rng: random.Random):
+    from server.delta import encode_delta, encode_snapshot, make_delta
+    from server.models import Log, Message, Page, Revision, User, db
+    from server.passwords import hash_password
+    from server.search_index import index_page
+
+    password = hash_password(PASSWORD)
+
+    for i in range(args.users):
+        user = User(f"user{i}@example.com", f"user{i}", password, "token")
+        user.verified = True
+        user.score = 10 ** 6
+        db.session.add(user)
+
+    db.session.flush()
+
+    pages = []
+
+    for i in range(args.pages):
+        size = min(int(rng.lognormvariate(8, 1)), args.max_page_size)
+        page = Page(f"Page {i} {random_words(rng, 2)}", random_content(rng, size), 0)
+        db.session.add(page)
+        pages.append(page)
+
+    db.session.flush()
+
+    for page in pages:
+        db.session.add(Revision(page.id, 0, True, encode_snapshot(page.content)))
+        index_page(page)
+
+    for _ in range(args.logs):
+        page = rng.choice(pages)
+        content = page.content + f"<p>{random_words(rng, 30)}</p>\n"
+        number = page.revision + 1
+
+        db.session.add(
+            Revision(
+                page.id,
+                number,
+                number % 16 == 0,
+                encode_snapshot(content)
+                if number % 16 == 0
+                else encode_delta(make_delta(page.content, content)),
+            )
+        )
+        db.session.add(
+            Log(rng.randint(1, args.users), page.id, page.revision, 0, number, 0)
+        )
+
+        page.content = content
+        page.revision = number
+
+    for i in range(args.messages):
+        db.session.add(Message(rng.randint(1, args.users), 0, f"Message {i}", "content"))
+
+    db.session.commit()
+    db.session.remove()
+
+
+def make_request(route: str, args, rng: random.Random, user: int) -> tuple:
+    if route == "page":
+        return "GET", f"/page/{rng.randint(1, args.pages)}/", {}
+    if route == "edit_page":
+        return (
+            "POST",
+            f"/edit-page/{rng.randint(1, args.pages)}/",
+            {
+                "data": {
+                    "content": random_content(rng, rng.randint(200, 4000)),
+                    "score_needed": "0",
+                }
+            },
+        )
+    if route == "search_result":
+        return "GET", f"/search-result/{random_words(rng, rng.randint(1, 2))}/0/", {}
+    if route == "logs":
+        return "GET", f"/logs/{rng.randint(0, max(args.logs // 20 - 1, 0))}/", {}
+    if route == "profile":
+        return "GET", f"/profile/{rng.randint(1, args.users)}/0/", {}
+    if route == "login":
+        return (
+            "POST",
+            "/login/",
+            {"data": {"email": f"user{user}@example.com", "password": PASSWORD}},
+        )
+
+    image = rng.randbytes(rng.randint(1024, 64 * 1024))
+
+    return (
+        "POST",
+        "/upload/",
+        {
+            "data": {"upload": (io.BytesIO(image), "image.png")},
+            "content_type": "multipart/form-data",
+        },
+    )
+
+
+def log_in(client, user: int):
+    client.post(
+        "/login/", data={"email": f"user{user}@example.com", "password": PASSWORD}
+    )
+
+
+def run_route(app, route: str, args, queries) -> dict:
+    results = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.concurrency + 1)
+
+    def work(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        user = index % args.users
+        client = app.test_client()
+
+        if route != "login":
+            log_in(client, user)
+
+        timings = []
+        errors = 0
+
+        start.wait()
+
+        for _ in range(args.requests // args.concurrency):
+            method, url, options = make_request(route, args, rng, user)
+
+            if route == "login":
+                client = app.test_client()
+
+            queries.count = 0
+            began = time.perf_counter()
+            response = client.open(url, method=method, **options)
+            elapsed = time.perf_counter() - began
+
+            if response.status_code >= 400:
+                errors += 1
+
+            timings.append((elapsed, queries.count))
+
+        with lock:
+            results.append((timings, errors))
+
+    threads = [
+        threading.Thread(target=work, args=(index,)) for index in range(args.concurrency)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    start.wait()
+    began = time.perf_counter()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - began
+
+    latencies = sorted(timing for timings, _ in results for timing, _ in timings)
+    statements = [count for timings, _ in results for _, count in timings]
+
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "queries_per_request": sum(statements) / len(statements),
+    }
+
+
+def git_commit() -> str or None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Seed a synthetic wiki and drive the hot routes through the test client."
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--max-page-size", type=int, default=200000)
+    parser.add_argument("--logs", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per route.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", help="SQLAlchemy URI, defaults to a temporary SQLite file.")
+    parser.add_argument("--output", help="Write the JSON report to this file as well.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = args.database or f"sqlite:///{path.join(directory, 'wiki.db')}"
+
+    write_config(directory, database, args.bcrypt_rounds)
+
+    run = load_server(directory)
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    queries = threading.local()
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def count_query(*_):
+        queries.count = getattr(queries, "count", 0) + 1
+
+    began = time.perf_counter()
+
+    with run.app.app_context():
+        run.upgrade_schema()
+        seed(args, random.Random(args.seed))
+
+    seeded = time.perf_counter() - began
+
+    app = run.run_app()
+
+    report = {
+        "commit": git_commit(),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "seed_seconds": seeded,
+        "routes": {route: run_route(app, route, args, queries) for route in args.routes},
+    }
+
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def write_config(directory: str, sticky_seconds: float):
+    with open(path.join(directory, "config.json"), "w") as file:
+        json.dump(
+            {
+                "PROJECT_NAME": "wiki",
+                "SECRET_KEY": "benchmark",
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path.join(directory, 'primary.db')}",
+                "SQLALCHEMY_BINDS": {
+                    "replica": f"sqlite:///{path.join(directory, 'replica.db')}"
+                },
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "REPLICA_STICKY_SECONDS": sticky_seconds,
+            },
+            file,
+        )
+
+
+def load_server(directory: str):
+    os.chdir(directory)
+    sys.path.insert(0, ROOT)
+
+    from server.db import REPLICA_BIND
+    from server.models import Page, app, db
+
+    primary = db.get_engine(app)
+    replica = db.get_engine(app, bind=REPLICA_BIND)
+
+    for engine, title in ((primary, "primary"), (replica, "replica")):
+        db.Model.metadata.create_all(engine)
+
+        with engine.begin() as connection:
+            connection.execute(
+                Page.__table__.insert(),
+                {"title": title, "content": title, "points_needed": 0},
+            )
+
+    @app.route("/routing/read/")
+    def routing_read():
+        return ",".join(title for (title,) in db.session.query(Page.title))
+
+    @app.route("/routing/write/", methods=["POST"])
+    def routing_write():
+        db.session.add(Page("written", "written", 0))
+        db.session.commit()
+
+        return ",".join(title for (title,) in db.session.query(Page.title))
+
+    return app
+
+
+def check(name: str, response, expected: set) -> bool:
+    body = response.get_data(as_text=True)
+    passed = response.status_code == 200 and set(body.split(",")) == expected
+
+    print(f"{'ok  ' if passed else 'FAIL'} {name}: {body!r}")
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that reads go to the replica bind and writes to the primary."
+    )
+    parser.add_argument("--sticky-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    write_config(directory, args.sticky_seconds)
+
+    app = load_server(directory)
+    client = app.test_client()
+
+    results = [
+        check("GET reads from the replica", client.get("/routing/read/"), {"replica"}),
+        check(
+            "POST writes to and reads from the primary",
+            client.post("/routing/write/"),
+            {"primary", "written"},
+        ),
+        check(
+            "GET after a write stays on the primary",
+            client.get("/routing/read/"),
+            {"primary", "written"},
+        ),
+    ]
+
+    time.sleep(args.sticky_seconds)
+
+    results.append(
+        check(
+            "GET after the sticky window reads from the replica",
+            client.get("/routing/read/"),
+            {"replica"},
+        )
+    )
+
+    other = app.test_client()
+    results.append(
+        check(
+            "GET from another client reads from the replica",
+            other.get("/routing/read/"),
+            {"replica"},
+        )
+    )
+
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import random
+import string
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from server.delta import (  # noqa: E402
+    apply_delta,
+    decode_delta,
+    decode_snapshot,
+    encode_delta,
+    encode_snapshot,
+    make_delta,
+)
+
+
+def random_paragraph(rng: random.Random) -> str:
+    words = (
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+        for _ in range(rng.randint(20, 80))
+    )
+
+    return f"<p>{' '.join(words)}</p>\n"
+
+
+def random_edit(rng: random.Random, content: str) -> str:
+    paragraphs = content.splitlines(keepends=True)
+    index = rng.randrange(len(paragraphs))
+    action = rng.random()
+
+    if action < 0.6:
+        paragraphs[index] = random_paragraph(rng)
+    elif action < 0.8:
+        paragraphs.insert(index, random_paragraph(rng))
+    elif len(paragraphs) > 1:
+        del paragraphs[index]
+
+    return "".join(paragraphs)
+
+
+def store(revisions: list, interval: int) -> list:
+    stored = []
+
+    for number, content in enumerate(revisions):
+        if number % interval == 0:
+            stored.append((True, encode_snapshot(content)))
+        else:
+            delta = make_delta(revisions[number - 1], content)
+            stored.append((False, encode_delta(delta)))
+
+    return stored
+
+
+def rebuild(stored: list, number: int) -> str:
+    base = number
+
+    while not stored[base][0]:
+        base -= 1
+
+    content = decode_snapshot(stored[base][1])
+
+    for _, data in stored[base + 1 : number + 1]:
+        content = apply_delta(content, decode_delta(data))
+
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure delta revision storage size and rebuild time."
+    )
+    parser.add_argument("--page-size", type=int, default=64 * 1024)
+    parser.add_argument("--revisions", type=int, default=500)
+    parser.add_argument("--interval", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    content = ""
+
+    while len(content) < args.page_size:
+        content += random_paragraph(rng)
+
+    revisions = [content]
+
+    for _ in range(args.revisions - 1):
+        revisions.append(random_edit(rng, revisions[-1]))
+
+    start = time.perf_counter()
+    stored = store(revisions, args.interval)
+    store_time = time.perf_counter() - start
+
+    full_bytes = sum(len(r.encode("utf-8")) for r in revisions)
+    stored_bytes = sum(len(data) for _, data in stored)
+
+    worst = args.interval - 1 if args.revisions > args.interval else args.revisions - 1
+    rebuild_times = []
+
+    for number in range(worst, len(revisions), args.interval):
+        start = time.perf_counter()
+        rebuilt = rebuild(stored, number)
+        rebuild_times.append(time.perf_counter() - start)
+
+        assert rebuilt == revisions[number]
+
+    print(f"page size:             {args.page_size} bytes")
+    print(f"revisions:             {len(revisions)}")
+    print(f"snapshot interval:     {args.interval}")
+    print(f"full copies:           {full_bytes / len(revisions):.0f} bytes/revision")
+    print(f"delta store:           {stored_bytes / len(revisions):.0f} bytes/revision")
+    print(f"store time:            {store_time / len(revisions) * 1000:.3f} ms/revision")
+    print(
+        f"rebuild (worst case):  {max(rebuild_times) * 1000:.3f} ms max, "
+        f"{sum(rebuild_times) / len(rebuild_times) * 1000:.3f} ms mean"
+    )
+
+
+if __name__ == "__main__":
+    main()
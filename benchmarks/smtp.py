@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        time.sleep(self.server.handshake_delay)
+
+        self.reply("220 localhost ESMTP sink")
+
+        while True:
+            line = self.rfile.readline()
+
+            if not line:
+                return
+
+            command = line.decode("ascii", "replace").strip().upper()
+
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+
+                with self.server.lock:
+                    self.server.received += 1
+
+                self.reply("250 OK")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPSinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay: float):
+        super().__init__(("127.0.0.1", 0), SMTPSink)
+
+        self.handshake_delay = handshake_delay
+        self.lock = threading.Lock()
+        self.received = 0
+
+
+def load_server(port: int):
+    directory = tempfile.mkdtemp()
+
+    with open(path.join(directory, "config.json"), "w") as file:
+        json.dump(
+            {
+                "PROJECT_NAME": "wiki",
+                "SQLALCHEMY_DATABASE_URI": "sqlite://",
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "EMAIL_ADDRESS": "wiki@localhost",
+                "EMAIL_PASSWORD": "",
+                "EMAIL_SMTP_HOST": "127.0.0.1",
+                "EMAIL_SMTP_PORT": port,
+                "EMAIL_SMTP_SSL": False,
+                "SERVER_TRANSFER_PROTOCOL": "http",
+                "SERVER_ADDRESS": "127.0.0.1",
+                "SERVER_PORT": 8000,
+            },
+            file,
+        )
+
+    os.chdir(directory)
+    sys.path.insert(0, ROOT)
+
+    from server import send_confirmation_email
+
+    return send_confirmation_email
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-message and pooled SMTP delivery against a local sink."
+    )
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument(
+        "--handshake-delay",
+        type=float,
+        default=0.02,
+        help="Seconds the sink waits before greeting, standing in for TLS and login.",
+    )
+    parser.add_argument(
+        "--flush",
+        action="store_true",
+        help="Also queue the messages in Redis and drain them with the Celery task.",
+    )
+    args = parser.parse_args()
+
+    sink = SMTPSinkServer(args.handshake_delay)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    emails = load_server(sink.server_address[1])
+    recipients = [f"user{i}@localhost" for i in range(args.messages)]
+
+    start = time.perf_counter()
+
+    for recipient in recipients:
+        emails.send_confirmation_email(recipient, "token")
+        emails.close_smtp_connection()
+
+    per_message = time.perf_counter() - start
+
+    start = time.perf_counter()
+
+    for recipient in recipients:
+        emails.send_confirmation_email(recipient, "token")
+
+    emails.close_smtp_connection()
+
+    pooled = time.perf_counter() - start
+
+    print(f"messages:              {args.messages}")
+    print(f"handshake delay:       {args.handshake_delay * 1000:.0f} ms")
+    print(f"connection per email:  {args.messages / per_message:8.1f} messages/s")
+    print(f"pooled connection:     {args.messages / pooled:8.1f} messages/s")
+
+    if args.flush:
+        from server.tasks import (
+            EMAIL_QUEUE_KEY,
+            flush_confirmation_emails_task,
+            redis_client,
+        )
+
+        redis_client.delete(EMAIL_QUEUE_KEY)
+        redis_client.rpush(
+            EMAIL_QUEUE_KEY, *(json.dumps([recipient, "token"]) for recipient in recipients)
+        )
+
+        start = time.perf_counter()
+        flush_confirmation_emails_task.run()
+        emails.close_smtp_connection()
+        flushed = time.perf_counter() - start
+
+        print(f"batched flush task:    {args.messages / flushed:8.1f} messages/s")
+
+    print(f"received by sink:      {sink.received}")
+
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,124 @@
+import gc
 import os
 import json
+import subprocess
+import sys
+import time
 
 with open(os.path.join(os.getcwd(), "config.json")) as file:
     conf = json.load(file)
 
+started = time.perf_counter()
+production = conf.get("PRODUCTION", False)
+cpu_count = os.cpu_count() or 1
+
 wsgi_app = "run:run_app()"
 bind = f'{conf.get("SERVER_ADDRESS")}:{conf.get("SERVER_PORT")}'
-workers = 4
-reload = True
+workers = conf.get("WORKERS", 2 * cpu_count + 1 if production else 4)
+threads = conf.get("THREADS", 2 if production else 1)
+reload = not production
+preload_app = production
+max_requests = conf.get("MAX_REQUESTS", 2000 if production else 0)
+max_requests_jitter = conf.get("MAX_REQUESTS_JITTER", max_requests // 10)
+max_worker_rss = conf.get("MAX_WORKER_RSS", 512) * 1024 * 1024
+
+
+def memory_usage() -> dict:
+    usage = {}
+
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            for line in file:
+                key, value = line.split(":", 1)
+
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    usage[key] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+
+        usage["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    usage["Private"] = usage.pop("Private_Clean", 0) + usage.pop("Private_Dirty", 0)
+
+    return usage
+
+
+def format_memory(usage: dict) -> str:
+    return " ".join(
+        f"{key.lower()}={value / (1024 * 1024):.1f}MB"
+        for key, value in usage.items()
+        if value or key == "Rss"
+    )
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def on_starting(server):
+    began = time.perf_counter()
+
+    subprocess.run(
+        [sys.executable, "-m", "flask", "upgrade-schema"],
+        env={**os.environ, "FLASK_APP": "run.py"},
+        check=True,
+    )
+
+    server.log.info("Schema set up in %.2fs", time.perf_counter() - began)
+
+
+def when_ready(server):
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+
+    server.log.info(
+        "Master ready in %.2fs (%s workers, %s threads, preload %s) %s",
+        time.perf_counter() - started,
+        workers,
+        threads,
+        "on" if preload_app else "off",
+        format_memory(memory_usage()),
+    )
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    broadcast = sys.modules.get("server.broadcast")
+
+    if broadcast is not None:
+        broadcast.start_listener()
+
+    worker.log.info(
+        "Worker %s started in %.3fs %s",
+        worker.pid,
+        time.perf_counter() - worker.forked_at,
+        format_memory(memory_usage()),
+    )
+
+
+def post_request(worker, req, environ, resp):
+    if max_worker_rss and current_rss() > max_worker_rss:
+        worker.log.info(
+            "Worker %s exceeded %sMB RSS, recycling",
+            worker.pid,
+            max_worker_rss // (1024 * 1024),
+        )
+
+        worker.alive = False
+
+
+def worker_exit(server, worker):
+    metrics = sys.modules.get("server.metrics")
+
+    if metrics is not None:
+        metrics.write_snapshot()
+
+    server.log.info("Worker %s exiting %s", worker.pid, format_memory(memory_usage()))
@@ -1,13 +1,16 @@
-from server import app, db
+from server.bulk_import import app
+from server.schema import upgrade_schema
+from server.warm_templates import warm_templates
 
 
 def run_app():
-    db.create_all()
+    warm_templates()
 
     return app
 
 
 if __name__ == "__main__":
-    db.create_all()
+    upgrade_schema()
+    warm_templates()
 
     app.run(debug=__debug__)
@@ -1,9 +1,20 @@
-from flask import flash, redirect, render_template, request, url_for
+from flask import (
+    Response,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required
 
+from .export import EXPORTS, export_chunks, export_lines, parse_resume
 from .get_navbar_items import get_navbar_items
 from .models import Message, User, db
+from .paginate import paginate
 from .page import app
+from .rate_limit import rate_limited
 
 
 @app.route("/apply-for-administrator/", methods=["GET", "POST"])
@@ -20,7 +31,6 @@ def apply_for_administrator():
         else:
             content = url_for
             message = Message(
-                Message.query.count(),
                 current_user.id,
                 app.config.get("REQUEST_TYPES").get("ADMINISTRATOR_APPLICATION"),
                 f"{current_user.username}:{current_user.id} is requesting admin.",
@@ -50,26 +60,25 @@ def message(message_id: str):
 
             return redirect(url_for("home"))
 
-        query = Message.query.filter_by(id=message_id)
-        message = query.first()
+        message = Message.query.filter_by(id=message_id, deleted=False).first()
+
+        if message is None:
+            flash("Message does not exist.")
+
+            return redirect(url_for("administrator_dashboard", page_id="0"))
 
         if request.method == "POST":
-            user = User.query.filter_by(id=message.user_id).first()
+            user = User.query.filter_by(id=message.user_id, deleted=False).first()
 
             if user is None:
                 flash("User does not exist.")
             else:
-                query.delete()
+                message.deleted = True
                 user.request_pending = False
 
                 if message.request_type == 0:
                     user.administrator = True
 
-                messages = Message.query.filter(Message.id > message.id)
-
-                for m in messages:
-                    m.id -= 1
-
                 db.session.commit()
 
             return redirect(url_for("administrator_dashboard", page_id="0"))
@@ -94,21 +103,22 @@ def administrator_dashboard(page_id: str):
         return redirect(url_for("home"))
 
     if current_user.administrator:
-        items_per_page = app.config.get("ITEMS_PER_PAGE")
-
-        query = Message.query.order_by(Message.id.desc()).limit(items_per_page)
-
-        messages = query.offset(items_per_page * page_id).all()
-
-        not_first_page = page_id > 0
-        not_last_page = query.offset(items_per_page * page_id + 1).all()
+        pagination = paginate(
+            Message.query.filter_by(deleted=False),
+            [Message.id],
+            page_id,
+            app.config.get("ITEMS_PER_PAGE"),
+            lambda message: (message.id,),
+        )
 
         return render_template(
             "administrator-dashboard.html",
             navbar_items=get_navbar_items(),
-            messages=messages,
-            not_first_page=not_first_page,
-            not_last_page=not_last_page,
+            messages=pagination.items,
+            not_first_page=pagination.not_first_page,
+            not_last_page=pagination.not_last_page,
+            previous_cursor=pagination.previous_cursor,
+            next_cursor=pagination.next_cursor,
             page_id=page_id,
         )
 
@@ -128,7 +138,7 @@ def delete_user(user_id: str):
         return redirect(url_for("home"))
 
     if current_user.administrator:
-        user = User.query.filter_by(id=user_id).first()
+        user = User.query.filter_by(id=user_id, deleted=False).first()
 
         if user is None:
             flash("User does not exist.")
@@ -142,3 +152,38 @@ def delete_user(user_id: str):
     flash("You are not an administrator.")
 
     return redirect(url_for("home"))
+
+
+@app.route("/export/")
+@login_required
+@rate_limited
+def export():
+    if not current_user.administrator:
+        flash("You are not an administrator.")
+
+        return redirect(url_for("home"))
+
+    types = request.args.get("types", ",".join(EXPORTS))
+    kinds = [kind for kind in types.split(",") if kind]
+
+    if not kinds or any(kind not in EXPORTS for kind in kinds):
+        flash("Unknown export type.")
+
+        return redirect(url_for("administrator_dashboard", page_id="0"))
+
+    after = request.args.get("after")
+    resume = parse_resume(after)
+
+    if after and resume is None:
+        flash("Resume position is not valid.")
+
+        return redirect(url_for("administrator_dashboard", page_id="0"))
+
+    compress = request.args.get("gzip") == "1"
+    filename = "wiki-export.ndjson.gz" if compress else "wiki-export.ndjson"
+
+    return Response(
+        stream_with_context(export_chunks(export_lines(kinds, resume), compress)),
+        mimetype="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -2,9 +2,90 @@ import json
 import os
 
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 
 with open(os.path.join(os.getcwd(), "config.json")) as file:
     config = json.load(file)
 
     app = Flask(config["PROJECT_NAME"])
     app.config.update(config)
+    app.config.setdefault("REVISION_SNAPSHOT_INTERVAL", 16)
+    app.config.setdefault(
+        "LOG_DIFF_CACHE_DIRECTORY", os.path.join(os.getcwd(), "cache", "diffs")
+    )
+    app.config.setdefault("LOG_DIFF_CONTEXT", 3)
+    app.config.setdefault("LOG_DIFF_STREAM_THRESHOLD", 256 * 1024)
+    app.config.setdefault("LOG_DIFF_CHUNK_SIZE", 64 * 1024)
+    app.config.setdefault("REPLICA_STICKY_SECONDS", 10)
+    app.config.setdefault(
+        "PAGE_CACHE_DIRECTORY", os.path.join(os.getcwd(), "cache", "pages")
+    )
+    app.config.setdefault(
+        "TEMPLATE_CACHE_DIRECTORY", os.path.join(os.getcwd(), "cache", "templates")
+    )
+
+    app.config.setdefault("SUGGEST_LIMIT", 10)
+
+    app.config.setdefault("USER_CACHE_SIZE", 10000)
+    app.config.setdefault("USER_CACHE_TTL", 30)
+
+    app.config.setdefault("BCRYPT_ROUNDS", 12)
+    app.config.setdefault("PASSWORD_POOL_SIZE", os.cpu_count() or 1)
+    app.config.setdefault(
+        "PASSWORD_QUEUE_LIMIT", 4 * app.config.get("PASSWORD_POOL_SIZE")
+    )
+
+    app.config.setdefault("REDIS_URL", "redis://127.0.0.1:6379/0")
+    app.config.setdefault("EMAIL_SMTP_HOST", "smtp.gmail.com")
+    app.config.setdefault("EMAIL_SMTP_PORT", 465)
+    app.config.setdefault("EMAIL_SMTP_SSL", True)
+    app.config.setdefault("EMAIL_SMTP_TIMEOUT", 30)
+    app.config.setdefault("EMAIL_SMTP_IDLE_TIMEOUT", 60)
+    app.config.setdefault("EMAIL_BATCH_SIZE", 50)
+    app.config.setdefault("EMAIL_BATCH_DELAY", 1)
+    app.config.setdefault("EMAIL_FLUSH_TIMEOUT", 300)
+    app.config.setdefault("EMAIL_MAX_RETRIES", 8)
+    app.config.setdefault("EMAIL_RETRY_BACKOFF", 5)
+    app.config.setdefault("EMAIL_RETRY_BACKOFF_MAX", 600)
+
+    app.config.setdefault(
+        "RATE_LIMITS",
+        {
+            "login": {"CAPACITY": 10, "PER_MINUTE": 10, "METHODS": ["POST"]},
+            "create_account": {"CAPACITY": 5, "PER_MINUTE": 2, "METHODS": ["POST"]},
+            "search_result": {"CAPACITY": 30, "PER_MINUTE": 60},
+            "edit_page": {"CAPACITY": 20, "PER_MINUTE": 20, "METHODS": ["POST"]},
+            "upload": {"CAPACITY": 10, "PER_MINUTE": 10, "METHODS": ["POST"]},
+            "export": {"CAPACITY": 2, "PER_MINUTE": 1},
+        },
+    )
+    app.config.setdefault("RATE_LIMIT_FALLBACK_SIZE", 10000)
+
+    app.config.setdefault("EXPORT_BATCH_SIZE", 1000)
+    app.config.setdefault("EXPORT_CHUNK_SIZE", 64 * 1024)
+
+    app.config.setdefault("EVENT_COALESCE_DELAY", 5)
+    app.config.setdefault("EVENT_COALESCE_TIMEOUT", 60)
+
+    app.config.setdefault("IMPORT_BATCH_SIZE", 1000)
+    app.config.setdefault("IMPORT_BATCH_BYTES", 32 * 1024 * 1024)
+
+    app.config.setdefault("UPLOAD_MAX_BYTES", 5 * 1024 * 1024)
+    app.config.setdefault("UPLOAD_CHUNK_SIZE", 64 * 1024)
+    app.config.setdefault("UPLOAD_GC_MIN_AGE", 24 * 60 * 60)
+
+    app.config.setdefault(
+        "METRICS_DIRECTORY", os.path.join(os.getcwd(), "cache", "metrics")
+    )
+    app.config.setdefault("METRICS_FLUSH_INTERVAL", 1)
+    app.config.setdefault("METRICS_ALLOWED_ADDRESSES", ["127.0.0.1", "::1"])
+
+    os.makedirs(app.config.get("TEMPLATE_CACHE_DIRECTORY"), exist_ok=True)
+    os.makedirs(app.config.get("METRICS_DIRECTORY"), exist_ok=True)
+
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache": FileSystemBytecodeCache(
+            app.config.get("TEMPLATE_CACHE_DIRECTORY")
+        ),
+    }
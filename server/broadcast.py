@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+
+from .redis_client import redis_client
+
+BROADCAST_CHANNEL = "wiki:broadcast"
+RESYNC = "resync"
+RECONNECT_DELAY = 1
+
+handlers = {}
+listener_lock = threading.Lock()
+state = {"listener": None, "process": uuid4().hex}
+
+
+def reset_listener():
+    state["listener"] = None
+    state["process"] = uuid4().hex
+
+
+os.register_at_fork(after_in_child=reset_listener)
+
+
+def on_broadcast(kind: str, handler, resync):
+    handlers[kind] = (handler, resync)
+
+
+def publish(kind: str, payload):
+    try:
+        redis_client.publish(
+            BROADCAST_CHANNEL,
+            json.dumps({"process": state["process"], "kind": kind, "payload": payload}),
+        )
+    except RedisError:
+        pass
+
+
+def resync_all():
+    for _, resync in handlers.values():
+        resync()
+
+
+def broadcast(kind: str, payload):
+    handlers[kind][0](payload)
+
+    publish(kind, payload)
+
+
+def broadcast_resync():
+    publish(RESYNC, None)
+
+
+def listen():
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(BROADCAST_CHANNEL)
+
+            resync_all()
+
+            for message in pubsub.listen():
+                data = json.loads(message["data"])
+
+                if data["process"] == state["process"]:
+                    continue
+
+                if data["kind"] == RESYNC:
+                    resync_all()
+                elif data["kind"] in handlers:
+                    handlers[data["kind"]][0](data["payload"])
+        except RedisError:
+            time.sleep(RECONNECT_DELAY)
+
+
+def start_listener():
+    with listener_lock:
+        if state["listener"] is not None:
+            return
+
+        state["listener"] = threading.Thread(
+            target=listen, name="broadcast", daemon=True
+        )
+        state["listener"].start()
@@ -0,0 +1,451 @@
+import gzip
+import html
+import json
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from xml.etree.ElementTree import iterparse
+
+import click
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+
+from .broadcast import broadcast_resync
+from .metrics import app
+from .models import Log, Page, Revision, SearchPosting, User, db
+from .revisions import encode_revision
+from .sanitize_content import sanitize_content
+from .schema import upgrade_schema
+from .search_index import posting_rows
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def open_input(location: str):
+    if location == "-":
+        return sys.stdin.buffer
+
+    if location.endswith(".gz"):
+        return gzip.open(location, "rb")
+
+    return open(location, "rb")
+
+
+def input_format(location: str) -> str:
+    name = location[:-3] if location.endswith(".gz") else location
+
+    return "xml" if name.endswith(".xml") else "ndjson"
+
+
+def ndjson_pages(file):
+    history = None
+
+    for line in file:
+        if not line.strip():
+            continue
+
+        record = json.loads(line)
+        kind = record.get("type", "pages")
+
+        if kind == "revisions":
+            if history is not None and history["history"] != record.get("page_id"):
+                yield history
+
+                history = None
+
+            if history is None:
+                history = {"history": record.get("page_id"), "revisions": []}
+
+            history["revisions"].append(record.get("content"))
+
+            continue
+
+        if history is not None:
+            yield history
+
+            history = None
+
+        if kind != "pages" or record.get("deleted"):
+            continue
+
+        yield {
+            "title": record.get("title"),
+            "revisions": record.get("revisions") or [record.get("content")],
+            "score_needed": record.get("score_needed", 0),
+            "source_id": record.get("id"),
+        }
+
+    if history is not None:
+        yield history
+
+
+def wikitext_html(text: str) -> str:
+    return "".join(
+        f"<p>{html.escape(paragraph.strip()).replace(chr(10), '<br>')}</p>"
+        for paragraph in PARAGRAPH_RE.split(text)
+        if paragraph.strip()
+    )
+
+
+def mediawiki_pages(file):
+    root = None
+    title = None
+    namespace = None
+    revisions = []
+
+    for event, element in iterparse(file, events=("start", "end")):
+        name = element.tag.rsplit("}", 1)[-1]
+
+        if event == "start":
+            if root is None:
+                root = element
+            elif name == "page":
+                title = None
+                namespace = None
+                revisions = []
+
+            continue
+
+        if name == "title":
+            title = element.text
+        elif name == "ns":
+            namespace = element.text
+        elif name == "text":
+            revisions.append(wikitext_html(element.text or ""))
+        elif name == "revision":
+            element.clear()
+        elif name == "page":
+            if namespace in (None, "0"):
+                yield {
+                    "title": title,
+                    "revisions": revisions,
+                    "score_needed": 0,
+                    "source_id": None,
+                }
+
+            root.clear()
+
+
+def revision_error(revisions: list) -> str or None:
+    for content in revisions:
+        if content is not None and len(content) > app.config.get("LIMITS").get(
+            "CONTENT"
+        ):
+            return "Content is too long."
+
+    return None
+
+
+def clean_revisions(revisions: list) -> list:
+    cleaned = []
+
+    for content in revisions:
+        if not content:
+            continue
+
+        content = sanitize_content(content)
+
+        if not cleaned or cleaned[-1] != content:
+            cleaned.append(content)
+
+    return cleaned
+
+
+def page_error(title: str or None, revisions: list, score_needed) -> str or None:
+    if title == "" or title is None:
+        return "Title is blank."
+
+    if len(title) > app.config.get("LIMITS").get("TITLE"):
+        return "Title is too long."
+
+    if not revisions:
+        return "Content is blank."
+
+    score_needed = str(score_needed)
+
+    if not score_needed.isdigit():
+        return "Score needed is not a number."
+
+    if len(score_needed) > app.config.get("LIMITS").get("SCORE_NEEDED"):
+        return "Score needed is too long."
+
+    return None
+
+
+def history_rows(page_id: int, contents: list, score_needed: int, user_id: int):
+    revisions = []
+    logs = []
+    previous = None
+
+    for number, content in enumerate(contents):
+        snapshot, data = encode_revision(number, previous, content)
+        revisions.append(
+            {
+                "page_id": page_id,
+                "number": number,
+                "snapshot": snapshot,
+                "data": data,
+            }
+        )
+
+        if previous is not None:
+            logs.append(
+                {
+                    "user_id": user_id,
+                    "post_id": page_id,
+                    "old_content": "",
+                    "old_revision": number - 1,
+                    "old_score_needed": score_needed,
+                    "new_content": "",
+                    "new_revision": number,
+                    "new_score_needed": score_needed,
+                }
+            )
+
+        previous = content
+
+    return revisions, logs
+
+
+def insert_rows(tables: list):
+    for table, rows in tables:
+        if rows:
+            db.session.execute(table.insert(), rows)
+
+
+def write_pages(pending: dict, user_id: int, stats: Counter, imported: dict):
+    existing = {
+        title
+        for (title,) in db.session.query(Page.title).filter(
+            Page.title.in_(list(pending))
+        )
+    }
+    pending = {
+        title: page for title, page in pending.items() if title not in existing
+    }
+    updated_at = datetime.utcnow()
+
+    insert_rows(
+        [
+            (
+                Page.__table__,
+                [
+                    {
+                        "title": title,
+                        "content": contents[-1],
+                        "points_needed": score_needed,
+                        "revision": len(contents) - 1,
+                        "deleted": False,
+                        "updated_at": updated_at,
+                    }
+                    for title, (contents, score_needed, _) in pending.items()
+                ],
+            )
+        ]
+    )
+
+    page_ids = dict(
+        db.session.query(Page.title, Page.id).filter(Page.title.in_(list(pending)))
+    )
+
+    revisions = []
+    logs = []
+    postings = []
+
+    for title, (contents, score_needed, source_id) in pending.items():
+        page_id = page_ids[title]
+        page_revisions, page_logs = history_rows(
+            page_id, contents, score_needed, user_id
+        )
+        revisions.extend(page_revisions)
+        logs.extend(page_logs)
+        postings.extend(posting_rows(page_id, title, contents[-1]))
+
+        if source_id is not None:
+            imported[source_id] = (page_id, score_needed)
+
+    insert_rows(
+        [
+            (Revision.__table__, revisions),
+            (Log.__table__, logs),
+            (SearchPosting.__table__, postings),
+        ]
+    )
+
+    stats["Title already exists."] += len(existing)
+    stats["pages"] += len(pending)
+    stats["logs"] += len(logs)
+    stats["rows"] += len(pending) + len(revisions) + len(logs) + len(postings)
+
+
+def write_histories(histories: dict, user_id: int, stats: Counter):
+    revisions = []
+    logs = []
+
+    for page_id, (contents, score_needed) in histories.items():
+        page_revisions, page_logs = history_rows(
+            page_id, contents, score_needed, user_id
+        )
+        revisions.extend(page_revisions)
+        logs.extend(page_logs)
+
+    Revision.query.filter(Revision.page_id.in_(list(histories))).delete(
+        synchronize_session=False
+    )
+    db.session.execute(
+        Page.__table__.update()
+        .where(Page.__table__.c.id == bindparam("page_id"))
+        .values(revision=bindparam("revision")),
+        [
+            {"page_id": page_id, "revision": len(contents) - 1}
+            for page_id, (contents, _) in histories.items()
+        ],
+    )
+    insert_rows([(Revision.__table__, revisions), (Log.__table__, logs)])
+
+    stats["histories"] += len(histories)
+    stats["logs"] += len(logs)
+    stats["rows"] += len(histories) + len(revisions) + len(logs)
+
+
+def write_batch(write, *args):
+    try:
+        write(*args)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        write(*args)
+        db.session.commit()
+
+
+def import_pages(records, user_id: int) -> Counter:
+    stats = Counter()
+    imported = {}
+    pending = {}
+    histories = {}
+    pending_bytes = 0
+
+    for record in records:
+        revisions = record["revisions"]
+        error = revision_error(revisions)
+        revisions = clean_revisions(revisions)
+
+        if "history" in record:
+            if pending:
+                write_batch(write_pages, pending, user_id, stats, imported)
+                pending = {}
+                pending_bytes = 0
+
+            page = imported.get(record["history"])
+
+            if page is None:
+                stats["History of a page that was not imported."] += 1
+
+                continue
+
+            if error is None and not revisions:
+                error = "Content is blank."
+
+            if error is not None:
+                stats[f"History kept as one revision: {error}"] += 1
+
+                continue
+
+            histories[page[0]] = (revisions, page[1])
+        else:
+            title = record["title"]
+            error = error or page_error(title, revisions, record["score_needed"])
+
+            if error is None and title in pending:
+                error = "Title already exists."
+
+            if error is not None:
+                stats[error] += 1
+
+                continue
+
+            pending[title] = (
+                revisions,
+                int(record["score_needed"]),
+                record["source_id"],
+            )
+
+        pending_bytes += sum(len(content) for content in revisions)
+
+        if (
+            len(pending) + len(histories) >= app.config.get("IMPORT_BATCH_SIZE")
+            or pending_bytes >= app.config.get("IMPORT_BATCH_BYTES")
+        ):
+            if pending:
+                write_batch(write_pages, pending, user_id, stats, imported)
+
+            if histories:
+                write_batch(write_histories, histories, user_id, stats)
+
+            pending = {}
+            histories = {}
+            pending_bytes = 0
+
+    if pending:
+        write_batch(write_pages, pending, user_id, stats, imported)
+
+    if histories:
+        write_batch(write_histories, histories, user_id, stats)
+
+    return stats
+
+
+@app.cli.command("import")
+@click.argument("location")
+@click.option("--format", "file_format", type=click.Choice(["ndjson", "xml"]))
+@click.option("--user-id", type=int, help="Author of imported edits.")
+def import_command(location: str, file_format: str or None, user_id: int or None):
+    upgrade_schema()
+
+    if user_id is None:
+        user = (
+            User.query.filter_by(administrator=True, deleted=False)
+            .order_by(User.id)
+            .first()
+        )
+
+        if user is None:
+            raise click.UsageError(
+                "No administrator to credit edits to, use --user-id."
+            )
+    else:
+        user = User.query.filter_by(id=user_id, deleted=False).first()
+
+        if user is None:
+            raise click.BadParameter("User does not exist.", param_hint="--user-id")
+
+    user_id = user.id
+    reader = (
+        mediawiki_pages
+        if (file_format or input_format(location)) == "xml"
+        else ndjson_pages
+    )
+
+    started = time.perf_counter()
+
+    with open_input(location) as file:
+        stats = import_pages(reader(file), user_id)
+
+    broadcast_resync()
+
+    elapsed = time.perf_counter() - started
+    pages = stats.pop("pages", 0)
+    histories = stats.pop("histories", 0)
+    logs = stats.pop("logs", 0)
+    rows = stats.pop("rows", 0)
+
+    print(
+        f"Imported {pages} pages, the history of {histories} pages and {logs} logs, "
+        f"{rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)."
+    )
+
+    for reason, count in stats.most_common():
+        if count:
+            print(f"Skipped {count}: {reason}")
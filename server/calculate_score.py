@@ -1,13 +1,8 @@
 from flask_login import current_user
 
-from .db import db
+from .count_changes import count_changes
+from .models import User
 
 
 def calculate_score(before: str, after: str):
-    for b, a in zip(before, after):
-        if b != a:
-            current_user.score += 1
-
-    current_user.score += abs(len(before) - len(after))
-
-    db.session.commit()
+    current_user.score = User.score + count_changes(before, after)
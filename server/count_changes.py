@@ -0,0 +1,78 @@
+from functools import lru_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BLOCK_SIZE = 1 << 12
+
+
+def encode_lanes(before: str, after: str) -> tuple:
+    if before.isascii() and after.isascii():
+        return before.encode("ascii"), after.encode("ascii"), 1
+
+    return (
+        before.encode("utf-32-le", "surrogatepass"),
+        after.encode("utf-32-le", "surrogatepass"),
+        4,
+    )
+
+
+def count_mismatches_numpy(before: bytes, after: bytes, width: int) -> int:
+    dtype = numpy.uint8 if width == 1 else numpy.uint32
+
+    return int(
+        numpy.count_nonzero(
+            numpy.frombuffer(before, dtype=dtype) != numpy.frombuffer(after, dtype=dtype)
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def lane_masks(width: int) -> tuple:
+    lanes = BLOCK_SIZE // width
+
+    return (
+        int.from_bytes((b"\xff" * (width - 1) + b"\x7f") * lanes, "little"),
+        int.from_bytes((b"\x00" * (width - 1) + b"\x80") * lanes, "little"),
+    )
+
+
+def count_mismatches_python(before: bytes, after: bytes, width: int) -> int:
+    block = BLOCK_SIZE - BLOCK_SIZE % width
+    low, high = lane_masks(width)
+    shift = 8 * width - 1
+
+    mismatches = 0
+
+    for start in range(0, len(before), block):
+        a = before[start : start + block]
+        b = after[start : start + block]
+
+        if a == b:
+            continue
+
+        difference = int.from_bytes(a, "little") ^ int.from_bytes(b, "little")
+        flags = (((difference & low) + low) | difference) & high
+
+        mismatches += (flags >> shift).to_bytes(block, "little").count(1)
+
+    return mismatches
+
+
+def count_changes(before: str, after: str, use_numpy: bool = True) -> int:
+    length = min(len(before), len(after))
+    changes = abs(len(before) - len(after))
+
+    before, after = before[:length], after[:length]
+
+    if before == after:
+        return changes
+
+    before, after, width = encode_lanes(before, after)
+
+    if use_numpy and numpy is not None:
+        return changes + count_mismatches_numpy(before, after, width)
+
+    return changes + count_mismatches_python(before, after, width)
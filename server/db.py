@@ -1,5 +1,54 @@
-from flask_sqlalchemy import SQLAlchemy
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
 
 from .app import app
 
-db = SQLAlchemy(app)
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+
+
+def reads_from_replica() -> bool:
+    if REPLICA_BIND not in (app.config.get("SQLALCHEMY_BINDS") or {}):
+        return False
+
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+
+    if g.get("use_primary"):
+        return False
+
+    return session.get("primary_until", 0) <= time.time()
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or (
+            clause is not None and not getattr(clause, "is_select", False)
+        ):
+            if has_request_context():
+                g.use_primary = True
+        elif clause is not None and reads_from_replica():
+            return db.get_engine(self.app, bind=REPLICA_BIND)
+
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy(app)
+
+
+@app.after_request
+def stick_to_primary(response):
+    if request.method not in READ_METHODS and REPLICA_BIND in (
+        app.config.get("SQLALCHEMY_BINDS") or {}
+    ):
+        session["primary_until"] = time.time() + app.config.get("REPLICA_STICKY_SECONDS")
+
+    return response
@@ -0,0 +1,106 @@
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+TOKEN_RE = re.compile(r"[^>\n]*[>\n]|[^>\n]+")
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    low, high = 0, min(len(a), len(b))
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def common_suffix_length(a: str, b: str, limit: int) -> int:
+    low, high = 0, limit
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if a[len(a) - middle : len(a) - low] == b[len(b) - middle : len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def make_delta(base: str, target: str) -> list:
+    prefix = common_prefix_length(base, target)
+    suffix = common_suffix_length(
+        base, target, min(len(base), len(target)) - prefix
+    )
+
+    ops = []
+
+    def copy(start: int, end: int):
+        if start == end:
+            return
+
+        if ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+            ops[-1][1] = end
+        else:
+            ops.append([start, end])
+
+    def insert(text: str):
+        if not text:
+            return
+
+        if ops and isinstance(ops[-1], str):
+            ops[-1] += text
+        else:
+            ops.append(text)
+
+    copy(0, prefix)
+
+    base_middle = base[prefix : len(base) - suffix]
+    target_middle = target[prefix : len(target) - suffix]
+
+    base_tokens = TOKEN_RE.findall(base_middle)
+    target_tokens = TOKEN_RE.findall(target_middle)
+
+    base_offsets = [prefix]
+
+    for token in base_tokens:
+        base_offsets.append(base_offsets[-1] + len(token))
+
+    matcher = SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            copy(base_offsets[i1], base_offsets[i2])
+        elif tag in ("replace", "insert"):
+            insert("".join(target_tokens[j1:j2]))
+
+    copy(len(base) - suffix, len(base))
+
+    return ops
+
+
+def apply_delta(base: str, delta: list) -> str:
+    return "".join(base[op[0] : op[1]] if isinstance(op, list) else op for op in delta)
+
+
+def encode_delta(delta: list) -> bytes:
+    return zlib.compress(json.dumps(delta, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_delta(data: bytes) -> list:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def encode_snapshot(content: str) -> bytes:
+    return zlib.compress(content.encode("utf-8"))
+
+
+def decode_snapshot(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
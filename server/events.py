@@ -0,0 +1,120 @@
+from functools import wraps
+
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from .app import app
+from .models import Page, db
+from .page_cache import invalidate_page
+from .redis_client import redis_client
+from .search_index import index_page, remove_page
+from .worker import worker
+
+EVENT_KEY = "wiki:events"
+
+consumers = {}
+inline_consumers = {}
+
+
+def pending_key(task_name: str, subject_id: int) -> str:
+    return f"{EVENT_KEY}:{task_name}:{subject_id}"
+
+
+def consumer(*names: str):
+    def register(function):
+        @worker.task
+        @wraps(function)
+        def task(subject_id: int):
+            redis_client.delete(pending_key(task.name, subject_id))
+
+            with app.app_context():
+                function(subject_id)
+
+        for name in names:
+            consumers.setdefault(name, []).append(task)
+
+        inline_consumers[task.name] = function
+
+        return task
+
+    return register
+
+
+def publish_event(name: str, subject_id: int):
+    db.session.info.setdefault("events", {})[(name, subject_id)] = None
+
+
+def schedule(task, subject_id: int) -> bool:
+    key = pending_key(task.name, subject_id)
+
+    try:
+        if not redis_client.set(
+            key, 1, nx=True, ex=app.config.get("EVENT_COALESCE_TIMEOUT")
+        ):
+            return True
+
+        task.apply_async(
+            (subject_id,), countdown=app.config.get("EVENT_COALESCE_DELAY")
+        )
+
+        return True
+    except (RedisError, OperationalError):
+        app.logger.exception(
+            "Could not schedule %s for %s, running it inline", task.name, subject_id
+        )
+
+        try:
+            redis_client.delete(key)
+        except RedisError:
+            pass
+
+        return False
+
+
+@event.listens_for(db.session, "after_commit")
+def dispatch_events(session):
+    for name, subject_id in session.info.pop("events", {}):
+        for task in consumers.get(name, ()):
+            if not schedule(task, subject_id):
+                session.info.setdefault("inline_events", {})[
+                    (task.name, subject_id)
+                ] = None
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_events(session, previous_transaction):
+    session.info.pop("events", None)
+
+
+@app.after_request
+def run_inline_events(response):
+    for task_name, subject_id in db.session.info.pop("inline_events", {}):
+        try:
+            inline_consumers[task_name](subject_id)
+        except SQLAlchemyError:
+            db.session.rollback()
+
+            app.logger.exception("Could not run %s for %s", task_name, subject_id)
+
+    return response
+
+
+@consumer("page_created", "page_edited", "page_deleted")
+def reindex_page(page_id: int):
+    page = Page.query.with_for_update().filter_by(id=page_id).first()
+
+    if page is None or page.deleted:
+        remove_page(page_id)
+    else:
+        index_page(page)
+
+    db.session.commit()
+
+
+@consumer("page_created", "page_edited", "page_deleted")
+def clean_page_cache(page_id: int):
+    page = db.session.query(Page.revision, Page.deleted).filter_by(id=page_id).first()
+
+    invalidate_page(page_id, None if page is None or page.deleted else page.revision)
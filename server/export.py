@@ -0,0 +1,192 @@
+import json
+import sys
+import time
+import zlib
+
+import click
+
+from .app import app
+from .delta import apply_delta, decode_delta, decode_snapshot
+from .models import Log, Message, Page, Revision, User, db
+
+EXPORTS = {
+    "users": (
+        User.id,
+        [
+            User.id,
+            User.username,
+            User.email,
+            User.verified,
+            User.administrator,
+            User.score,
+            User.request_pending,
+            User.deleted,
+        ],
+    ),
+    "pages": (
+        Page.id,
+        [
+            Page.id,
+            Page.title,
+            Page.content,
+            Page.score_needed,
+            Page.revision,
+            Page.deleted,
+            Page.updated_at,
+        ],
+    ),
+    "revisions": (
+        Revision.page_id,
+        [Revision.page_id, Revision.number, Revision.snapshot, Revision.data],
+    ),
+    "logs": (
+        Log.id,
+        [
+            Log.id,
+            Log.user_id,
+            Log.page_id,
+            Log.old_revision,
+            Log.old_score_needed,
+            Log.new_revision,
+            Log.new_score_needed,
+            Log.legacy_old_content,
+            Log.legacy_new_content,
+        ],
+    ),
+    "messages": (
+        Message.id,
+        [
+            Message.id,
+            Message.user_id,
+            Message.request_type,
+            Message.title,
+            Message.content,
+            Message.deleted,
+        ],
+    ),
+}
+
+
+def parse_resume(after: str or None) -> tuple or None:
+    if not after:
+        return None
+
+    kind, _, row_id = after.partition(":")
+
+    if kind not in EXPORTS or not row_id.isdigit():
+        return None
+
+    return kind, int(row_id)
+
+
+def export_rows(kind: str, after_id: int):
+    position, columns = EXPORTS[kind]
+    order = [position] if kind != "revisions" else [Revision.page_id, Revision.number]
+
+    return (
+        db.session.query(*columns)
+        .filter(position > after_id)
+        .order_by(*order)
+        .yield_per(app.config.get("EXPORT_BATCH_SIZE"))
+    )
+
+
+def revision_records(rows):
+    page_id = None
+    content = None
+
+    for row in rows:
+        if row.page_id != page_id:
+            page_id = row.page_id
+            content = None
+
+        if row.snapshot:
+            content = decode_snapshot(row.data)
+        elif content is not None:
+            content = apply_delta(content, decode_delta(row.data))
+
+        yield {"page_id": row.page_id, "number": row.number, "content": content}
+
+
+def export_records(kinds: list, resume: tuple or None = None):
+    if resume is not None:
+        kinds = kinds[kinds.index(resume[0]) :] if resume[0] in kinds else []
+
+    for kind in kinds:
+        after_id = resume[1] if resume is not None and resume[0] == kind else 0
+        rows = export_rows(kind, after_id)
+
+        if kind == "revisions":
+            records = revision_records(rows)
+        else:
+            records = (row._asdict() for row in rows)
+
+        for record in records:
+            yield kind, record
+
+
+def export_lines(kinds: list, resume: tuple or None = None):
+    for kind, record in export_records(kinds, resume):
+        yield json.dumps({"type": kind, **record}, default=str) + "\n"
+
+
+def export_chunks(lines, compress: bool):
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    chunk_size = app.config.get("EXPORT_CHUNK_SIZE")
+    chunk = []
+    size = 0
+
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+
+        if size >= chunk_size:
+            data = "".join(chunk).encode("utf-8")
+            chunk = []
+            size = 0
+
+            yield compressor.compress(data) if compressor else data
+
+    data = "".join(chunk).encode("utf-8")
+
+    if compressor:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
+
+
+@app.cli.command("export")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default="-")
+@click.option("--gzip", "compress", is_flag=True)
+@click.option("--types", default=",".join(EXPORTS))
+@click.option(
+    "--after", help="Resume after TYPE:ID, e.g. logs:5000 (revisions resume by page id)."
+)
+def export_command(output: str, compress: bool, types: str, after: str or None):
+    kinds = [kind for kind in types.split(",") if kind]
+    unknown = [kind for kind in kinds if kind not in EXPORTS]
+
+    if unknown:
+        raise click.BadParameter(f"Unknown types: {', '.join(unknown)}.")
+
+    resume = parse_resume(after)
+
+    if after and resume is None:
+        raise click.BadParameter("Expected TYPE:ID.", param_hint="--after")
+
+    started = time.perf_counter()
+    written = 0
+    file = sys.stdout.buffer if output == "-" else open(output, "wb")
+
+    try:
+        for chunk in export_chunks(export_lines(kinds, resume), compress):
+            file.write(chunk)
+            written += len(chunk)
+    finally:
+        if file is not sys.stdout.buffer:
+            file.close()
+
+    print(
+        f"Exported {written} bytes in {time.perf_counter() - started:.1f}s.",
+        file=sys.stderr,
+    )
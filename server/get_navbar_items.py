@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 from flask_login import current_user
+from markupsafe import Markup
 
 from .app import app
 
@@ -10,6 +13,7 @@ def get_navbar_items() -> dict[str, str]:
             "logout": "logout",
             "my profile": "my-profile/0/",
             "logs": "logs/0/",
+            "leaderboard": "leaderboard/0/",
         }
 
         if current_user.score >= app.config.get("SCORE_NEEDED").get("CREATE"):
@@ -27,4 +31,21 @@ def get_navbar_items() -> dict[str, str]:
 
         return items
 
-    return {"create account": "create-account", "login": "login", "logs": "logs/0/"}
+    return {
+        "create account": "create-account",
+        "login": "login",
+        "logs": "logs/0/",
+        "leaderboard": "leaderboard/0/",
+    }
+
+
+@lru_cache(maxsize=64)
+def render_navbar_fragment(items: tuple) -> Markup:
+    return Markup(
+        app.jinja_env.get_template("navbar.html").render(navbar_items=dict(items))
+    )
+
+
+@app.template_global()
+def render_navbar(navbar_items: dict) -> Markup:
+    return render_navbar_fragment(tuple(navbar_items.items()))
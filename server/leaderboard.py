@@ -0,0 +1,239 @@
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+from .app import app
+from .models import User, db
+from .paginate import Pagination, format_cursor, paginate, seek
+from .redis_client import redis_client
+from .worker import worker
+
+LEADERBOARD_KEY = "wiki:leaderboard"
+REBUILD_KEY = f"{LEADERBOARD_KEY}:rebuild"
+REBUILD_LOCK_KEY = f"{LEADERBOARD_KEY}:rebuild-lock"
+REBUILD_SCHEDULED_KEY = f"{LEADERBOARD_KEY}:rebuild-scheduled"
+REBUILD_LOCK_TIMEOUT = 10 * 60
+REBUILD_BATCH_SIZE = 1000
+UPDATE_RANK_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("ZADD", KEYS[1], ARGV[1], ARGV[2])
+end
+
+if redis.call("EXISTS", KEYS[3]) == 1 then
+    redis.call("ZADD", KEYS[2], ARGV[1], ARGV[2])
+end
+"""
+REMOVE_RANK_SCRIPT = """
+redis.call("ZREM", KEYS[1], ARGV[1])
+redis.call("ZREM", KEYS[2], ARGV[1])
+"""
+
+update_rank_script = redis_client.register_script(UPDATE_RANK_SCRIPT)
+remove_rank_script = redis_client.register_script(REMOVE_RANK_SCRIPT)
+
+
+def update_rank(user: User):
+    try:
+        update_rank_script(
+            keys=[LEADERBOARD_KEY, REBUILD_KEY, REBUILD_LOCK_KEY],
+            args=[user.score, str(user.id)],
+        )
+    except RedisError:
+        pass
+
+
+def remove_rank(user_id: int):
+    try:
+        remove_rank_script(keys=[LEADERBOARD_KEY, REBUILD_KEY], args=[str(user_id)])
+    except RedisError:
+        pass
+
+
+def rebuild_leaderboard() -> int or None:
+    if not redis_client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_TIMEOUT):
+        return None
+
+    try:
+        redis_client.delete(REBUILD_KEY)
+
+        pipeline = redis_client.pipeline(transaction=False)
+        ranked = 0
+        users = (
+            db.session.query(User.id, User.score)
+            .filter(User.deleted.is_(False))
+            .yield_per(REBUILD_BATCH_SIZE)
+        )
+
+        for user_id, score in users:
+            pipeline.zadd(REBUILD_KEY, {str(user_id): score}, nx=True)
+            ranked += 1
+
+            if ranked % REBUILD_BATCH_SIZE == 0:
+                pipeline.execute()
+
+        pipeline.execute()
+
+        if redis_client.exists(REBUILD_KEY):
+            redis_client.rename(REBUILD_KEY, LEADERBOARD_KEY)
+        else:
+            redis_client.delete(LEADERBOARD_KEY)
+
+        return ranked
+    finally:
+        redis_client.delete(REBUILD_LOCK_KEY)
+
+
+@worker.task
+def rebuild_leaderboard_task():
+    try:
+        with app.app_context():
+            rebuild_leaderboard()
+    finally:
+        redis_client.delete(REBUILD_SCHEDULED_KEY)
+
+
+def schedule_rebuild():
+    if not redis_client.set(
+        REBUILD_SCHEDULED_KEY, 1, nx=True, ex=REBUILD_LOCK_TIMEOUT
+    ):
+        return
+
+    try:
+        rebuild_leaderboard_task.apply_async()
+    except OperationalError:
+        app.logger.exception("Could not schedule a leaderboard rebuild")
+
+        redis_client.delete(REBUILD_SCHEDULED_KEY)
+
+
+def ensure_leaderboard() -> bool:
+    if redis_client.exists(LEADERBOARD_KEY):
+        return True
+
+    schedule_rebuild()
+
+    return False
+
+
+def rank_keys() -> list:
+    return [User.score, User.id]
+
+
+def count_higher_scores(score: int) -> int:
+    return User.query.filter(User.deleted.is_(False), User.score > score).count()
+
+
+def count_ranked_before(score: int, user_id: int) -> int:
+    return User.query.filter(
+        User.deleted.is_(False), seek(rank_keys(), (score, user_id), False)
+    ).count()
+
+
+def get_rank(user_id: int) -> int or None:
+    try:
+        if ensure_leaderboard():
+            score = redis_client.zscore(LEADERBOARD_KEY, str(user_id))
+
+            if score is not None:
+                return (
+                    redis_client.zcount(LEADERBOARD_KEY, f"({score}", "+inf") + 1
+                )
+    except RedisError:
+        pass
+
+    user = User.query.filter_by(id=user_id, deleted=False).first()
+
+    if user is None:
+        return None
+
+    return count_higher_scores(user.score) + 1
+
+
+def rank_entries(entries: list, start: int, first_rank: int) -> list:
+    rank = first_rank
+    previous_score = entries[0][1] if entries else None
+    ranked = []
+
+    for index, (user, score) in enumerate(entries):
+        if score != previous_score:
+            rank = start + index + 1
+            previous_score = score
+
+        if user is not None and not user.deleted:
+            ranked.append((rank, user))
+
+    return ranked
+
+
+def get_redis_leaderboard(page_id: int, items_per_page: int) -> Pagination:
+    start = page_id * items_per_page
+    entries = redis_client.zrevrange(
+        LEADERBOARD_KEY, start, start + items_per_page, withscores=True
+    )
+    not_last_page = len(entries) > items_per_page
+    entries = [
+        (int(user_id), int(score)) for user_id, score in entries[:items_per_page]
+    ]
+
+    if not entries:
+        return Pagination([], page_id > 0, not_last_page, None, None)
+
+    users = {
+        user.id: user
+        for user in User.query.filter(User.id.in_([user_id for user_id, _ in entries]))
+    }
+    first_rank = redis_client.zcount(LEADERBOARD_KEY, f"({entries[0][1]}", "+inf") + 1
+
+    return Pagination(
+        rank_entries(
+            [(users.get(user_id), score) for user_id, score in entries],
+            start,
+            first_rank,
+        ),
+        page_id > 0,
+        not_last_page,
+        format_cursor(entries[0][::-1]),
+        format_cursor(entries[-1][::-1]),
+    )
+
+
+def get_database_leaderboard(page_id: int, items_per_page: int) -> Pagination:
+    pagination = paginate(
+        User.query.filter(User.deleted.is_(False)),
+        rank_keys(),
+        page_id,
+        items_per_page,
+        lambda user: (user.score, user.id),
+    )
+
+    if not pagination.items:
+        return pagination
+
+    first = pagination.items[0]
+
+    return pagination._replace(
+        items=rank_entries(
+            [(user, user.score) for user in pagination.items],
+            count_ranked_before(first.score, first.id),
+            count_higher_scores(first.score) + 1,
+        )
+    )
+
+
+def get_leaderboard(page_id: int, items_per_page: int) -> Pagination:
+    try:
+        if ensure_leaderboard():
+            return get_redis_leaderboard(page_id, items_per_page)
+    except RedisError:
+        pass
+
+    return get_database_leaderboard(page_id, items_per_page)
+
+
+@app.cli.command("rebuild-leaderboard")
+def rebuild_leaderboard_command():
+    ranked = rebuild_leaderboard()
+
+    if ranked is None:
+        print("Another rebuild is already running.")
+    else:
+        print(f"Ranked {ranked} users.")
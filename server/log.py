@@ -1,9 +1,13 @@
-from flask import flash, redirect, render_template, url_for
+from os import path
+
+from flask import Response, flash, redirect, render_template, url_for
 from flask_login import login_required
 
 from .administrator import app
 from .get_navbar_items import get_navbar_items
+from .log_diff import log_diff_path, read_chunks, stream_template
 from .models import Log
+from .paginate import paginate
 
 
 @app.route("/logs/<page_id>/", methods=["GET", "POST"])
@@ -16,21 +20,22 @@ def logs(page_id: str):
 
         return redirect(url_for("home"))
 
-    items_per_page = app.config.get("ITEMS_PER_PAGE")
-
-    query = Log.query.order_by(Log.id.desc()).limit(items_per_page)
-
-    logs = query.offset(items_per_page * page_id).all()
-
-    not_first_page = page_id > 0
-    not_last_page = query.offset(items_per_page * page_id + 1).all()
+    pagination = paginate(
+        Log.query,
+        [Log.id],
+        page_id,
+        app.config.get("ITEMS_PER_PAGE"),
+        lambda log: (log.id,),
+    )
 
     return render_template(
         "logs.html",
         navbar_items=get_navbar_items(),
-        logs=logs,
-        not_first_page=not_first_page,
-        not_last_page=not_last_page,
+        logs=pagination.items,
+        not_first_page=pagination.not_first_page,
+        not_last_page=pagination.not_last_page,
+        previous_cursor=pagination.previous_cursor,
+        next_cursor=pagination.next_cursor,
         page_id=page_id,
     )
 
@@ -52,4 +57,21 @@ def log(log_id: str):
 
         return redirect(url_for("home"))
 
-    return render_template("log.html", navbar_items=get_navbar_items(), log=log)
+    location = log_diff_path(log)
+
+    if path.getsize(location) > app.config.get("LOG_DIFF_STREAM_THRESHOLD"):
+        return Response(
+            stream_template(
+                "log.html",
+                navbar_items=get_navbar_items(),
+                log=log,
+                diff=read_chunks(location),
+            )
+        )
+
+    with open(location, encoding="utf-8") as file:
+        diff = [file.read()]
+
+    return render_template(
+        "log.html", navbar_items=get_navbar_items(), log=log, diff=diff
+    )
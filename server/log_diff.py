@@ -0,0 +1,117 @@
+import os
+import re
+from difflib import SequenceMatcher
+from os import path
+from tempfile import NamedTemporaryFile
+
+from flask import stream_with_context
+
+from .app import app
+from .models import Log
+from .revisions import get_log_contents
+
+LINE_RE = re.compile(
+    r".*?(?:</(?:p|div|li|ul|ol|h[1-6]|blockquote|pre|table|tr|figure)>|<br\s*/?>|\n)|.+",
+    re.IGNORECASE | re.DOTALL,
+)
+WORD_RE = re.compile(r"\s+|\w+|[^\w\s]")
+
+
+def split_lines(content: str or None) -> list:
+    lines = (line.strip("\r\n") for line in LINE_RE.findall(content or ""))
+
+    return [line for line in lines if line.strip()]
+
+
+def word_segments(old_line: str, new_line: str) -> tuple:
+    old_words = WORD_RE.findall(old_line)
+    new_words = WORD_RE.findall(new_line)
+
+    old_segments = []
+    new_segments = []
+
+    for tag, i1, i2, j1, j2 in SequenceMatcher(
+        None, old_words, new_words, autojunk=False
+    ).get_opcodes():
+        if i1 < i2:
+            old_segments.append((tag != "equal", "".join(old_words[i1:i2])))
+
+        if j1 < j2:
+            new_segments.append((tag != "equal", "".join(new_words[j1:j2])))
+
+    return old_segments, new_segments
+
+
+def changed_lines(old_lines: list, new_lines: list) -> list:
+    removed = [("removed", [(True, line)]) for line in old_lines]
+    added = [("added", [(True, line)]) for line in new_lines]
+
+    for index, (old_line, new_line) in enumerate(zip(old_lines, new_lines)):
+        old_segments, new_segments = word_segments(old_line, new_line)
+
+        removed[index] = ("removed", old_segments)
+        added[index] = ("added", new_segments)
+
+    return removed + added
+
+
+def diff_hunks(old_content: str, new_content: str, context: int):
+    old_lines = split_lines(old_content)
+    new_lines = split_lines(new_content)
+
+    matcher = SequenceMatcher(None, old_lines, new_lines)
+
+    for group in matcher.get_grouped_opcodes(context):
+        lines = []
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend(("context", [(False, line)]) for line in old_lines[i1:i2])
+            else:
+                lines.extend(changed_lines(old_lines[i1:i2], new_lines[j1:j2]))
+
+        yield {
+            "old_start": group[0][1] + 1,
+            "old_count": group[-1][2] - group[0][1],
+            "new_start": group[0][3] + 1,
+            "new_count": group[-1][4] - group[0][3],
+            "lines": lines,
+        }
+
+
+def log_diff_path(log: Log) -> str:
+    location = path.join(
+        app.config.get("LOG_DIFF_CACHE_DIRECTORY"),
+        f"{log.id}-{log.page_id}-{log.old_revision}-{log.new_revision}.html",
+    )
+
+    if path.exists(location):
+        return location
+
+    old_content, new_content = get_log_contents(log)
+
+    os.makedirs(path.dirname(location), exist_ok=True)
+
+    with NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.dirname(location), delete=False
+    ) as file:
+        for chunk in app.jinja_env.get_template("log-diff.html").generate(
+            hunks=diff_hunks(old_content, new_content, app.config.get("LOG_DIFF_CONTEXT"))
+        ):
+            file.write(chunk)
+
+    os.replace(file.name, location)
+
+    return location
+
+
+def read_chunks(location: str):
+    with open(location, encoding="utf-8") as file:
+        for chunk in iter(lambda: file.read(app.config.get("LOG_DIFF_CHUNK_SIZE")), ""):
+            yield chunk
+
+
+def stream_template(template_name: str, **context):
+    app.update_template_context(context)
+
+    return stream_with_context(app.jinja_env.get_template(template_name).generate(context))
@@ -1,17 +1,25 @@
+from datetime import datetime
+
 from flask_login import current_user
 
 from .models import Log, Page, db
+from .revisions import add_revision
+
 
+def log_edit(page: Page, old_content: str, old_score_needed: int):
+    number = page.revision + 1
+
+    add_revision(page.id, number, old_content, page.content)
 
-def log_edit(old_page: Page, new_page: Page):
     log = Log(
-        Log.query.count(),
         current_user.id,
-        new_page.id,
-        old_page.content,
-        old_page.score_needed,
-        new_page.content,
-        new_page.score_needed,
+        page.id,
+        page.revision,
+        old_score_needed,
+        number,
+        page.score_needed,
     )
+    page.revision = number
+    page.updated_at = datetime.utcnow()
+
     db.session.add(log)
-    db.session.commit()
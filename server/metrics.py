@@ -0,0 +1,364 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from glob import glob
+
+from celery.signals import after_task_publish, before_task_publish
+from flask import (
+    Response,
+    abort,
+    before_render_template,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .log import app
+from .passwords import password_pool_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+METRICS = {
+    "wiki_request_duration_seconds": ("histogram", "Time spent handling a request."),
+    "wiki_request_sql_statements": ("histogram", "SQL statements issued per request."),
+    "wiki_sql_statements_total": ("counter", "SQL statements issued by requests."),
+    "wiki_sql_duration_seconds_total": ("counter", "Time requests spent in SQL."),
+    "wiki_template_render_seconds": ("histogram", "Time spent rendering a template."),
+    "wiki_task_publish_seconds": ("histogram", "Time spent sending a Celery task."),
+    "wiki_password_pool_queued": ("gauge", "Password hashes waiting for a thread."),
+    "wiki_password_pool_running": ("gauge", "Password hashes being computed."),
+    "wiki_password_pool_completed_total": ("counter", "Password hashes computed."),
+    "wiki_password_pool_rejected_total": ("counter", "Password hashes refused as busy."),
+}
+
+lock = threading.Lock()
+local = threading.local()
+metrics = {"counters": {}, "histograms": {}}
+state = {"flusher": None}
+
+
+def reset_metrics():
+    metrics["counters"] = {}
+    metrics["histograms"] = {}
+    state["flusher"] = None
+
+
+os.register_at_fork(after_in_child=reset_metrics)
+
+
+def metric_key(name: str, labels: dict) -> str:
+    return json.dumps([name, sorted(labels.items())])
+
+
+def increment(name: str, labels: dict, value: float = 1):
+    key = metric_key(name, labels)
+
+    with lock:
+        metrics["counters"][key] = metrics["counters"].get(key, 0) + value
+
+
+def observe(name: str, labels: dict, value: float, buckets: tuple = DURATION_BUCKETS):
+    key = metric_key(name, labels)
+
+    with lock:
+        histogram = metrics["histograms"].get(key)
+
+        if histogram is None:
+            histogram = metrics["histograms"][key] = {
+                "buckets": list(buckets),
+                "counts": [0] * (len(buckets) + 1),
+                "sum": 0,
+            }
+
+        histogram["counts"][bisect_left(buckets, value)] += 1
+        histogram["sum"] += value
+
+
+def empty_metrics() -> dict:
+    return {"counters": {}, "histograms": {}, "gauges": {}}
+
+
+def take_snapshot() -> dict:
+    snapshot = empty_metrics()
+
+    with lock:
+        snapshot["counters"].update(metrics["counters"])
+        snapshot["histograms"].update(
+            (key, {**histogram, "counts": list(histogram["counts"])})
+            for key, histogram in metrics["histograms"].items()
+        )
+
+    stats = password_pool_stats()
+
+    for name in ("queued", "running"):
+        snapshot["gauges"][metric_key(f"wiki_password_pool_{name}", {})] = stats[name]
+
+    for name in ("completed", "rejected"):
+        snapshot["counters"][metric_key(f"wiki_password_pool_{name}_total", {})] = stats[
+            name
+        ]
+
+    return snapshot
+
+
+def write_json(path: str, data: dict):
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    with open(temporary, "w") as file:
+        json.dump(data, file)
+
+    os.replace(temporary, path)
+
+
+def read_json(path: str) -> dict or None:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot():
+    if not metrics["counters"] and not metrics["histograms"]:
+        return
+
+    write_json(
+        os.path.join(app.config.get("METRICS_DIRECTORY"), f"metrics-{os.getpid()}.json"),
+        take_snapshot(),
+    )
+
+
+atexit.register(write_snapshot)
+
+
+def flush_snapshots():
+    while True:
+        time.sleep(app.config.get("METRICS_FLUSH_INTERVAL"))
+
+        write_snapshot()
+
+
+def start_flusher():
+    with lock:
+        if state["flusher"] is not None:
+            return
+
+        state["flusher"] = threading.Thread(
+            target=flush_snapshots, name="metrics", daemon=True
+        )
+        state["flusher"].start()
+
+
+def merge(total: dict, snapshot: dict, gauges: bool = True):
+    for key, value in snapshot["counters"].items():
+        total["counters"][key] = total["counters"].get(key, 0) + value
+
+    for key, histogram in snapshot["histograms"].items():
+        merged = total["histograms"].get(key)
+
+        if merged is None:
+            total["histograms"][key] = {**histogram, "counts": list(histogram["counts"])}
+        else:
+            merged["counts"] = [a + b for a, b in zip(merged["counts"], histogram["counts"])]
+            merged["sum"] += histogram["sum"]
+
+    if gauges:
+        for key, value in snapshot["gauges"].items():
+            total["gauges"][key] = total["gauges"].get(key, 0) + value
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def collect() -> dict:
+    write_snapshot()
+
+    directory = app.config.get("METRICS_DIRECTORY")
+
+    with open(os.path.join(directory, "archive.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        archive_path = os.path.join(directory, "archive.json")
+        archive = read_json(archive_path) or empty_metrics()
+        total = empty_metrics()
+        merge(total, archive, gauges=False)
+
+        archived = False
+
+        for path in glob(os.path.join(directory, "metrics-*.json")):
+            snapshot = read_json(path)
+            pid = int(os.path.basename(path)[len("metrics-") : -len(".json")])
+
+            if snapshot is None:
+                continue
+
+            if is_alive(pid):
+                merge(total, snapshot)
+            else:
+                merge(archive, snapshot, gauges=False)
+                merge(total, snapshot, gauges=False)
+                os.remove(path)
+
+                archived = True
+
+        if archived:
+            write_json(archive_path, archive)
+
+    return total
+
+
+def format_labels(labels: list) -> str:
+    if not labels:
+        return ""
+
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_metrics(total: dict) -> str:
+    series = {}
+
+    for kind in ("counters", "gauges", "histograms"):
+        for key, value in total[kind].items():
+            name, labels = json.loads(key)
+            series.setdefault(name, []).append((labels, value))
+
+    lines = []
+
+    for name in sorted(series):
+        kind, description = METRICS.get(name, ("untyped", name))
+
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for labels, value in sorted(series[name], key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{name}{format_labels(labels)} {value}")
+
+                continue
+
+            cumulative = 0
+
+            for bucket, count in zip(value["buckets"] + ["+Inf"], value["counts"]):
+                cumulative += count
+
+                lines.append(
+                    f"{name}_bucket{format_labels(labels + [['le', str(bucket)]])} {cumulative}"
+                )
+
+            lines.append(f"{name}_sum{format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement(connection, cursor, statement, parameters, context, executemany):
+    connection.info["metrics_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def finish_statement(connection, cursor, statement, parameters, context, executemany):
+    started = connection.info.pop("metrics_started", None)
+
+    if started is None or not has_request_context() or "metrics" not in g:
+        return
+
+    g.metrics["statements"] += 1
+    g.metrics["sql_duration"] += time.perf_counter() - started
+
+
+@before_render_template.connect_via(app)
+def start_template(sender, template, context, **extra):
+    g.setdefault("template_started", []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def finish_template(sender, template, context, **extra):
+    started = g.get("template_started")
+
+    if started:
+        observe(
+            "wiki_template_render_seconds",
+            {"template": template.name},
+            time.perf_counter() - started.pop(),
+        )
+
+
+@before_task_publish.connect
+def start_task_publish(sender=None, **kwargs):
+    local.publish_started = time.perf_counter()
+
+
+@after_task_publish.connect
+def finish_task_publish(sender=None, **kwargs):
+    started = getattr(local, "publish_started", None)
+
+    if started is not None:
+        local.publish_started = None
+
+        observe("wiki_task_publish_seconds", {"task": sender}, time.perf_counter() - started)
+
+
+@app.before_request
+def start_request():
+    if state["flusher"] is None:
+        start_flusher()
+
+    g.metrics = {"started": time.perf_counter(), "statements": 0, "sql_duration": 0.0}
+
+
+@app.teardown_request
+def finish_request(error):
+    request_metrics = g.pop("metrics", None)
+
+    if request_metrics is None:
+        return
+
+    labels = {
+        "endpoint": request.url_rule.endpoint if request.url_rule else "unmatched",
+        "method": request.method,
+    }
+
+    observe(
+        "wiki_request_duration_seconds",
+        labels,
+        time.perf_counter() - request_metrics["started"],
+    )
+    observe(
+        "wiki_request_sql_statements",
+        labels,
+        request_metrics["statements"],
+        STATEMENT_BUCKETS,
+    )
+    increment("wiki_sql_statements_total", labels, request_metrics["statements"])
+    increment("wiki_sql_duration_seconds_total", labels, request_metrics["sql_duration"])
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    if request.remote_addr not in app.config.get("METRICS_ALLOWED_ADDRESSES"):
+        abort(404)
+
+    return Response(
+        render_metrics(collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,11 +1,22 @@
+from datetime import datetime
+from itertools import chain
+from threading import Lock
+
+from cachetools import TTLCache
 from flask_login import LoginManager, UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 
 from .app import app
+from .broadcast import broadcast, on_broadcast, start_listener
 from .db import db
 
 login_manager = LoginManager()
 login_manager.init_app(app)
 
+user_cache_lock = Lock()
+user_cache = TTLCache(app.config.get("USER_CACHE_SIZE"), app.config.get("USER_CACHE_TTL"))
+
 
 class User(UserMixin, db.Model):
     id = db.Column("id", db.Integer, primary_key=True)
@@ -17,16 +28,19 @@ class User(UserMixin, db.Model):
     token = db.Column("token", db.Text, nullable=False)
     score = db.Column("score", db.Integer, nullable=False)
     request_pending = db.Column("request_pending", db.Boolean, nullable=False)
+    deleted = db.Column(
+        "deleted", db.Boolean, nullable=False, server_default=db.false()
+    )
+
+    __table_args__ = (db.Index("ix_user_score_id", "score", "id"),)
 
     def __init__(
         self,
-        id: int,
         email: str,
         username: str,
         password: str,
         token: str,
     ):
-        self.id = id
         self.email = email
         self.username = username
         self.password = password
@@ -35,11 +49,86 @@ class User(UserMixin, db.Model):
         self.token = token
         self.score = 0
         self.request_pending = False
+        self.deleted = False
+
+
+def cache_user(user: User):
+    columns = {
+        attribute.key: getattr(user, attribute.key)
+        for attribute in User.__mapper__.column_attrs
+    }
+
+    with user_cache_lock:
+        user_cache[user.id] = columns
+
+
+def get_cached_user(user_id: int) -> User or None:
+    with user_cache_lock:
+        columns = user_cache.get(user_id)
+
+    if columns is None:
+        return None
+
+    user = User.__mapper__.class_manager.new_instance()
+
+    for key, value in columns.items():
+        setattr(user, key, value)
+
+    make_transient_to_detached(user)
+
+    return db.session.merge(user, load=False)
+
+
+def forget_user(user_id: int):
+    with user_cache_lock:
+        user_cache.pop(user_id, None)
+
+
+def forget_all_users():
+    with user_cache_lock:
+        user_cache.clear()
+
+
+on_broadcast("user", forget_user, forget_all_users)
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_changed_users(session, flush_context):
+    session.info.setdefault("changed_users", set()).update(
+        instance.id
+        for instance in chain(session.dirty, session.deleted)
+        if isinstance(instance, User)
+    )
+
+
+@event.listens_for(db.session, "after_commit")
+def broadcast_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        broadcast("user", user_id)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_changed_users(session, previous_transaction):
+    session.info.pop("changed_users", None)
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    start_listener()
+
+    user = get_cached_user(int(user_id))
+
+    if user is not None:
+        return user
+
+    user = User.query.get(int(user_id))
+
+    if user is None or user.deleted:
+        return None
+
+    cache_user(user)
+
+    return user
 
 
 class Page(db.Model):
@@ -47,12 +136,21 @@ class Page(db.Model):
     title = db.Column("title", db.String(), unique=True, nullable=False)
     content = db.Column("content", db.Text, nullable=False)
     score_needed = db.Column("points_needed", db.Integer, nullable=False)
+    revision = db.Column("revision", db.Integer, nullable=False, server_default="0")
+    deleted = db.Column(
+        "deleted", db.Boolean, nullable=False, server_default=db.false()
+    )
+    updated_at = db.Column("updated_at", db.DateTime)
+
+    __mapper_args__ = {"version_id_col": revision, "version_id_generator": False}
 
-    def __init__(self, id: int, title: str, content: str, score_needed: int):
-        self.id = id
+    def __init__(self, title: str, content: str, score_needed: int):
         self.title = title
         self.content = content
         self.score_needed = score_needed
+        self.revision = 0
+        self.deleted = False
+        self.updated_at = datetime.utcnow()
 
 
 class Message(db.Model):
@@ -61,40 +159,104 @@ class Message(db.Model):
     request_type = db.Column("request_type", db.Integer, nullable=False)
     title = db.Column("title", db.Integer, nullable=False)
     content = db.Column("content", db.Integer, nullable=False)
+    deleted = db.Column(
+        "deleted", db.Boolean, nullable=False, server_default=db.false()
+    )
 
-    def __init__(
-        self, id: int, user_id: int, request_type: int, title: str, content: str
-    ):
-        self.id = id
+    __table_args__ = (
+        db.Index("ix_message_deleted_id", "deleted", "id"),
+        db.Index("ix_message_user_id_id", "user_id", "id"),
+    )
+
+    def __init__(self, user_id: int, request_type: int, title: str, content: str):
         self.user_id = user_id
         self.request_type = request_type
         self.title = title
         self.content = content
+        self.deleted = False
 
 
 class Log(db.Model):
     id = db.Column("id", db.Integer, primary_key=True)
     user_id = db.Column("user_id", db.Integer, nullable=False)
     page_id = db.Column("post_id", db.Integer, nullable=False)
-    old_content = db.Column("old_content", db.Text, nullable=False)
+    legacy_old_content = db.Column(
+        "old_content", db.Text, nullable=False, server_default=""
+    )
+    old_revision = db.Column("old_revision", db.Integer)
     old_score_needed = db.Column("old_score_needed", db.Text, nullable=False)
-    new_content = db.Column("new_content", db.Text, nullable=False)
+    legacy_new_content = db.Column(
+        "new_content", db.Text, nullable=False, server_default=""
+    )
+    new_revision = db.Column("new_revision", db.Integer)
     new_score_needed = db.Column("new_score_needed", db.Text, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_log_user_id_id", "user_id", "id"),
+        db.Index("ix_log_post_id_id", "post_id", "id"),
+    )
+
     def __init__(
         self,
-        id: int,
         user_id: int,
         page_id: int,
-        old_content: str,
+        old_revision: int,
         old_score_needed: int,
-        new_content: str,
+        new_revision: int,
         new_score_needed: int,
     ):
-        self.id = id
         self.user_id = user_id
         self.page_id = page_id
-        self.old_content = old_content
+        self.legacy_old_content = ""
+        self.old_revision = old_revision
         self.old_score_needed = old_score_needed
-        self.new_content = new_content
+        self.legacy_new_content = ""
+        self.new_revision = new_revision
         self.new_score_needed = new_score_needed
+
+
+class Revision(db.Model):
+    id = db.Column("id", db.Integer, primary_key=True)
+    page_id = db.Column("page_id", db.Integer, nullable=False)
+    number = db.Column("number", db.Integer, nullable=False)
+    snapshot = db.Column("snapshot", db.Boolean, nullable=False)
+    data = db.Column("data", db.LargeBinary, nullable=False)
+
+    __table_args__ = (db.Index("ix_revision_page_id_number", "page_id", "number"),)
+
+    def __init__(self, page_id: int, number: int, snapshot: bool, data: bytes):
+        self.page_id = page_id
+        self.number = number
+        self.snapshot = snapshot
+        self.data = data
+
+
+class SearchPosting(db.Model):
+    id = db.Column("id", db.Integer, primary_key=True)
+    term = db.Column("term", db.Text, nullable=False)
+    page_id = db.Column("page_id", db.Integer, nullable=False)
+    weight = db.Column("weight", db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_search_posting_term_page_id", "term", "page_id", "weight"),
+        db.Index("ix_search_posting_term_weight", "term", "weight", "page_id"),
+        db.Index("ix_search_posting_page_id", "page_id"),
+    )
+
+    def __init__(self, term: str, page_id: int, weight: int):
+        self.term = term
+        self.page_id = page_id
+        self.weight = weight
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+
+    version = db.Column("version", db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column("description", db.Text, nullable=False)
+    applied_at = db.Column("applied_at", db.DateTime, nullable=False)
+
+    def __init__(self, version: int, description: str):
+        self.version = version
+        self.description = description
+        self.applied_at = datetime.utcnow()
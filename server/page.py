@@ -1,16 +1,52 @@
-from datetime import datetime, timezone
 from os import path
-from uuid import uuid4
 
-from flask import flash, redirect, render_template, request, session, url_for
+from flask import (
+    flash,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
 from flask_login import current_user, login_required
+from sqlalchemy.orm.exc import StaleDataError
 
 from .app import app
 from .calculate_score import calculate_score
+from .events import publish_event
 from .get_navbar_items import get_navbar_items
+from .leaderboard import update_rank
 from .log_edit import log_edit
-from .models import Page, db
+from .models import Page, User, db
+from .page_cache import get_page_body, page_etag
 from .profile import app
+from .rate_limit import rate_limited
+from .revisions import add_revision
+from .sanitize_content import sanitize_content
+from .title_index import update_title
+from .uploads import UploadTooLarge, store_upload
+
+
+@app.errorhandler(StaleDataError)
+def page_edited_concurrently(error: StaleDataError):
+    db.session.rollback()
+
+    flash("The page was changed while you were editing it, please try again.")
+
+    return redirect(request.path, 303)
+
+
+def not_modified(etag: str, updated_at) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if updated_at is None or request.if_modified_since is None:
+        return False
+
+    return updated_at.replace(microsecond=0) <= request.if_modified_since.replace(
+        tzinfo=None
+    )
 
 
 def upload_fail(message: str):
@@ -22,8 +58,16 @@ def upload_success(location: str):
 
 
 def upload_file():
+    if request.content_length is not None and request.content_length > app.config.get(
+        "UPLOAD_MAX_BYTES"
+    ) + app.config.get("UPLOAD_CHUNK_SIZE"):
+        return upload_fail("The file is too large.")
+
     f = request.files.get("upload")
 
+    if f is None:
+        return upload_fail("No file was uploaded.")
+
     split = f.filename.split(".")
 
     if len(split) != 2:
@@ -34,31 +78,18 @@ def upload_file():
     if extension not in ["jpg", "gif", "png", "jpeg"]:
         return upload_fail("The file extension is not supported.")
 
-    unique_filename = str(uuid4())
-
-    f.filename = unique_filename + "." + extension
-    location = path.join("static", f.filename)
-
-    f.save(location)
-
-    session["LAST_UPLOAD_TIME"] = datetime.now()
+    try:
+        location = store_upload(f.stream, extension)
+    except UploadTooLarge:
+        return upload_fail("The file is too large.")
 
     return upload_success(location)
 
 
 @app.route("/upload/", methods=["POST"])
+@rate_limited
 def upload():
-    current_upload_time = datetime.now()
-    last_upload_time = session.get("LAST_UPLOAD_TIME")
-
-    if last_upload_time is None:
-        return upload_file()
-    elif (
-        current_upload_time.replace(tzinfo=timezone.utc) - last_upload_time
-    ).total_seconds() >= app.config.get("TIME_BETWEEN_UPLOADS"):
-        return upload_file()
-    else:
-        return upload_fail("You are uploading too quickly.")
+    return upload_file()
 
 
 @app.route("/page/<page_id>/")
@@ -70,18 +101,46 @@ def page(page_id: str):
 
         return redirect(url_for("home"))
 
-    page = Page.query.filter_by(id=page_id).first()
+    page = (
+        db.session.query(Page.id, Page.revision, Page.updated_at)
+        .filter_by(id=page_id, deleted=False)
+        .first()
+    )
 
     if page is None:
         flash("Page does not exist.")
 
         return redirect(url_for("home"))
 
-    return render_template(
-        "page.html",
-        navbar_items=get_navbar_items(),
-        page=page,
-    )
+    navbar_items = get_navbar_items()
+
+    if "_flashes" in session:
+        return render_template(
+            "page.html",
+            navbar_items=navbar_items,
+            body=get_page_body(page.id, page.revision),
+        )
+
+    etag = page_etag(page.id, page.revision, navbar_items)
+
+    if not_modified(etag, page.updated_at):
+        response = make_response("", 304)
+    else:
+        response = make_response(
+            render_template(
+                "page.html",
+                navbar_items=navbar_items,
+                body=get_page_body(page.id, page.revision),
+            )
+        )
+
+    response.set_etag(etag, weak=True)
+    response.last_modified = page.updated_at
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+
+    return response
 
 
 @app.route("/create-page/", methods=["GET", "POST"])
@@ -110,7 +169,9 @@ def create_page():
                     "create-page.html", navbar_items=get_navbar_items()
                 )
 
-            if Page.query.filter_by(title=title).count() > 0:
+            existing_page = Page.query.filter_by(title=title).first()
+
+            if existing_page is not None and not existing_page.deleted:
                 flash(f"Page with name {title} already exists.")
 
                 return render_template(
@@ -133,7 +194,7 @@ def create_page():
                     "create-page.html", navbar_items=get_navbar_items()
                 )
 
-            content = content.replace("<script>", "").replace("</script>", "")
+            content = sanitize_content(content)
 
             score_needed: str or None = request.form.get("score_needed")
 
@@ -163,16 +224,31 @@ def create_page():
                         "create-page.html", navbar_items=get_navbar_items()
                     )
 
-                current_user.score += len(content)
+                current_user.score = User.score + len(content)
 
-                page = Page(
-                    Page.query.count(),
-                    title,
-                    content,
-                    score_needed,
-                )
-                db.session.add(page)
-                db.session.commit()
+                if existing_page is None:
+                    page = Page(title, content, score_needed)
+                    db.session.add(page)
+                    db.session.flush()
+
+                    add_revision(page.id, page.revision, None, content)
+                    publish_event("page_created", page.id)
+                    db.session.commit()
+                else:
+                    page = existing_page
+                    old_content = page.content
+                    old_score_needed = page.score_needed
+
+                    page.content = content
+                    page.score_needed = score_needed
+                    page.deleted = False
+
+                    log_edit(page, old_content, old_score_needed)
+                    publish_event("page_created", page.id)
+                    db.session.commit()
+
+                update_title(page)
+                update_rank(current_user)
 
                 return redirect(url_for("page", page_id=page.id))
 
@@ -186,6 +262,7 @@ def create_page():
 
 
 @app.route("/edit-page/<page_id>/", methods=["GET", "POST"])
+@rate_limited
 @login_required
 def edit_page(page_id: str):
     if current_user.verified:
@@ -196,7 +273,7 @@ def edit_page(page_id: str):
 
             return redirect(url_for("home"))
 
-        page = Page.query.filter_by(id=page_id).first()
+        page = Page.query.filter_by(id=page_id, deleted=False).first()
 
         if page is None:
             flash("Page does not exist.")
@@ -207,7 +284,8 @@ def edit_page(page_id: str):
             if request.method == "POST":
                 score_needed: str or None = request.form.get("score_needed")
 
-                old_page = page
+                old_content = page.content
+                old_score_needed = page.score_needed
 
                 if score_needed != page.score_needed:
                     if score_needed != "" and score_needed is not None:
@@ -265,17 +343,18 @@ def edit_page(page_id: str):
                                 page=page,
                             )
 
-                        content = content.replace("<script>", "").replace(
-                            "</script>", ""
-                        )
+                        content = sanitize_content(content)
 
                         calculate_score(page.content, content)
 
                         page.content = content
 
-                        log_edit(old_page, page)
+                        log_edit(page, old_content, old_score_needed)
+                        publish_event("page_edited", page.id)
 
                         db.session.commit()
+
+                        update_rank(current_user)
                 else:
                     flash("Inputs are the same.")
 
@@ -304,8 +383,7 @@ def delete_page(page_id: str):
 
         return redirect(url_for("home"))
 
-    query = Page.query.filter_by(id=page_id)
-    page = query.first()
+    page = Page.query.filter_by(id=page_id, deleted=False).first()
 
     if page is None:
         flash("Page does not exist.")
@@ -323,7 +401,7 @@ def delete_page(page_id: str):
                     "delete-page.html", navbar_items=get_navbar_items(), page=page
                 )
 
-            if title > app.config.get("LIMITS").get("TITLE"):
+            if len(title) > app.config.get("LIMITS").get("TITLE"):
                 flash("Title is too long.")
 
                 return render_template(
@@ -331,14 +409,14 @@ def delete_page(page_id: str):
                 )
 
             if page.title == title:
-                query.delete()
-                pages = Page.query.filter(Page.id > page.id).all()
+                page.deleted = True
 
-                for p in pages:
-                    p.id -= 1
+                publish_event("page_deleted", page.id)
 
                 db.session.commit()
 
+                update_title(page)
+
                 flash("Page has been deleted")
 
                 return redirect(url_for("home"))
@@ -0,0 +1,57 @@
+import os
+from glob import glob
+from hashlib import sha1
+from os import path
+from tempfile import NamedTemporaryFile
+
+from flask import render_template
+
+from .app import app
+from .models import Page
+
+
+def page_body_path(page_id: int, revision: int) -> str:
+    return path.join(app.config.get("PAGE_CACHE_DIRECTORY"), f"{page_id}-{revision}.html")
+
+
+def get_page_body(page_id: int, revision: int) -> str:
+    location = page_body_path(page_id, revision)
+
+    try:
+        with open(location, encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        pass
+
+    body = render_template("page-body.html", page=Page.query.get(page_id))
+
+    os.makedirs(path.dirname(location), exist_ok=True)
+
+    with NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.dirname(location), delete=False
+    ) as file:
+        file.write(body)
+
+    os.replace(file.name, location)
+
+    return body
+
+
+def invalidate_page(page_id: int, current_revision: int or None = None):
+    pattern = path.join(app.config.get("PAGE_CACHE_DIRECTORY"), f"{page_id}-*.html")
+    current = page_body_path(page_id, current_revision)
+
+    for location in glob(pattern):
+        if location == current:
+            continue
+
+        try:
+            os.remove(location)
+        except FileNotFoundError:
+            pass
+
+
+def page_etag(page_id: int, revision: int, navbar_items: dict) -> str:
+    navbar = sha1(repr(sorted(navbar_items.items())).encode("utf-8")).hexdigest()
+
+    return f"{page_id}-{revision}-{navbar[:16]}"
@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+from flask import request
+from sqlalchemy import and_, or_
+
+Pagination = namedtuple(
+    "Pagination",
+    ["items", "not_first_page", "not_last_page", "previous_cursor", "next_cursor"],
+)
+
+
+def parse_cursor(cursor: str or None, length: int) -> tuple or None:
+    if cursor is None:
+        return None
+
+    values = cursor.split(".")
+
+    if len(values) != length or not all(value.isdigit() for value in values):
+        return None
+
+    return tuple(int(value) for value in values)
+
+
+def format_cursor(values: tuple) -> str:
+    return ".".join(str(value) for value in values)
+
+
+def seek(keys: list, values: tuple, after: bool):
+    key, value = keys[0], values[0]
+    condition = key < value if after else key > value
+
+    if len(keys) == 1:
+        return condition
+
+    bound = key <= value if after else key >= value
+
+    return and_(
+        bound, or_(condition, and_(key == value, seek(keys[1:], values[1:], after)))
+    )
+
+
+def paginate(
+    query,
+    keys: list,
+    page_id: int,
+    items_per_page: int,
+    cursor,
+    grouped: bool = False,
+) -> Pagination:
+    after = parse_cursor(request.args.get("after"), len(keys))
+    before = parse_cursor(request.args.get("before"), len(keys))
+
+    restrict = query.having if grouped else query.filter
+
+    if before is not None:
+        rows = (
+            restrict(seek(keys, before, False))
+            .order_by(*keys)
+            .limit(items_per_page + 1)
+            .all()
+        )
+
+        items = rows[:items_per_page][::-1]
+        not_first_page = len(rows) > items_per_page
+        not_last_page = True
+    else:
+        if after is not None:
+            query = restrict(seek(keys, after, True))
+
+        query = query.order_by(*(key.desc() for key in keys)).limit(items_per_page + 1)
+
+        if after is None:
+            query = query.offset(items_per_page * page_id)
+
+        rows = query.all()
+
+        items = rows[:items_per_page]
+        not_first_page = after is not None or page_id > 0
+        not_last_page = len(rows) > items_per_page
+
+    if not items:
+        return Pagination(items, not_first_page and page_id > 0, False, None, None)
+
+    return Pagination(
+        items,
+        not_first_page,
+        not_last_page,
+        format_cursor(cursor(items[0])),
+        format_cursor(cursor(items[-1])),
+    )
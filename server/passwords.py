@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+from bcrypt import checkpw, gensalt, hashpw
+from flask import flash, redirect, request
+
+from .app import app
+
+pool_lock = Lock()
+pool = {"pid": None, "executor": None, "slots": None}
+stats = {"queued": 0, "running": 0, "completed": 0, "rejected": 0}
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+@app.errorhandler(PasswordPoolBusy)
+def password_pool_busy(error: PasswordPoolBusy):
+    flash("The server is busy, please try again in a moment.")
+
+    return redirect(request.path, 303)
+
+
+def get_pool() -> tuple:
+    with pool_lock:
+        if pool["pid"] != os.getpid():
+            pool["pid"] = os.getpid()
+            pool["executor"] = ThreadPoolExecutor(
+                max_workers=app.config.get("PASSWORD_POOL_SIZE"),
+                thread_name_prefix="bcrypt",
+            )
+            pool["slots"] = BoundedSemaphore(app.config.get("PASSWORD_QUEUE_LIMIT"))
+
+            stats.update((key, 0) for key in stats)
+
+        return pool["executor"], pool["slots"]
+
+
+def run(function, *args):
+    executor, slots = get_pool()
+
+    if not slots.acquire(blocking=False):
+        with pool_lock:
+            stats["rejected"] += 1
+
+        raise PasswordPoolBusy()
+
+    with pool_lock:
+        stats["queued"] += 1
+
+    def work():
+        with pool_lock:
+            stats["queued"] -= 1
+            stats["running"] += 1
+
+        try:
+            return function(*args)
+        finally:
+            with pool_lock:
+                stats["running"] -= 1
+                stats["completed"] += 1
+
+            slots.release()
+
+    return executor.submit(work).result()
+
+
+def hash_password(password: str) -> str:
+    return run(
+        hashpw, bytes(password, "utf-8"), gensalt(app.config.get("BCRYPT_ROUNDS"))
+    ).decode("utf-8")
+
+
+def check_password(password: str, hashed: str) -> bool:
+    return run(checkpw, bytes(password, "utf-8"), bytes(hashed, "utf-8"))
+
+
+def needs_rehash(hashed: str) -> bool:
+    parts = hashed.split("$")
+
+    return len(parts) < 4 or parts[2] != f"{app.config.get('BCRYPT_ROUNDS'):02d}"
+
+
+def password_pool_stats() -> dict:
+    with pool_lock:
+        return dict(stats)
@@ -1,14 +1,18 @@
 from secrets import token_urlsafe
 
-from bcrypt import checkpw, gensalt, hashpw
-from flask import flash, redirect, render_template, request, url_for
+from flask import flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, login_required, login_user, logout_user
 
 from .app import app
 from .get_navbar_items import get_navbar_items
-from .models import Log, Page, User, db
-from .send_confirmation_email import send_confirmation_email
-from .tasks import send_confirmation_email_task
+from .leaderboard import get_leaderboard, get_rank, remove_rank
+from .models import Log, User, db
+from .paginate import paginate
+from .passwords import check_password, hash_password, needs_rehash
+from .rate_limit import rate_limited
+from .search_index import search_pages
+from .tasks import queue_confirmation_email
+from .title_index import suggest_titles
 from .verify_request import (
     verify_email_quiet,
     verify_password_quiet,
@@ -43,6 +47,7 @@ def search():
 
 
 @app.route("/search-result/<search>/<page_id>/", methods=["GET", "POST"])
+@rate_limited
 def search_result(search: str, page_id: str):
     if page_id.isdigit():
         page_id = int(page_id)
@@ -54,39 +59,46 @@ def search_result(search: str, page_id: str):
     if len(search) > app.config.get("LIMITS").get("TITLE"):
         flash("Search is too long.")
 
-        return render_template(
-            "search-result.html",
-            navbar_items=get_navbar_items(),
-            search=search,
-            pages=pages,
-            not_first_page=not_first_page,
-            not_last_page=not_last_page,
-            page_id=page_id,
-        )
+        return render_template("search.html", navbar_items=get_navbar_items())
 
-    items_per_page = app.config.get("ITEMS_PER_PAGE")
-
-    title_ilike = Page.title.ilike(f"{search}")
-
-    query = Page.query.filter(title_ilike).limit(items_per_page)
-
-    pages = query.offset(items_per_page * page_id).all()
-
-    not_first_page = page_id > 0
-    not_last_page = (query.offset(items_per_page * page_id + 1).count()) > 0
+    pagination = search_pages(search, page_id, app.config.get("ITEMS_PER_PAGE"))
 
     return render_template(
         "search-result.html",
         navbar_items=get_navbar_items(),
         search=search,
-        pages=pages,
-        not_first_page=not_first_page,
-        not_last_page=not_last_page,
+        pages=pagination.items,
+        not_first_page=pagination.not_first_page,
+        not_last_page=pagination.not_last_page,
+        previous_cursor=pagination.previous_cursor,
+        next_cursor=pagination.next_cursor,
         page_id=page_id,
     )
 
 
+@app.route("/api/suggest/")
+def suggest():
+    prefix: str = request.args.get("q", "")
+
+    if len(prefix) > app.config.get("LIMITS").get("TITLE"):
+        return jsonify([])
+
+    limit = request.args.get("limit", "")
+    limit = min(
+        int(limit) if limit.isdigit() else app.config.get("SUGGEST_LIMIT"),
+        app.config.get("SUGGEST_LIMIT"),
+    )
+
+    return jsonify(
+        [
+            {"title": title, "url": url_for("page", page_id=page_id)}
+            for page_id, title in suggest_titles(prefix, limit)
+        ]
+    )
+
+
 @app.route("/login/", methods=["GET", "POST"])
+@rate_limited
 def login():
     if current_user.is_authenticated:
         flash("You are already logged in.")
@@ -125,7 +137,11 @@ def login():
 
             return render_template("login.html", navbar_items=get_navbar_items())
 
-        if checkpw(bytes(password, "utf-8"), bytes(user.password, "utf-8")):
+        if check_password(password, user.password):
+            if needs_rehash(user.password):
+                user.password = hash_password(password)
+                db.session.commit()
+
             login_user(user)
 
             return redirect(url_for("home"))
@@ -136,6 +152,7 @@ def login():
 
 
 @app.route("/create-account/", methods=["GET", "POST"])
+@rate_limited
 def create_account():
     if current_user.is_authenticated:
         flash("You are already logged in.")
@@ -195,33 +212,30 @@ def profile(user_id: str, page_id: str):
 
         return redirect(url_for("home"))
 
-    user = User.query.filter_by(id=user_id).first()
+    user = User.query.filter_by(id=user_id, deleted=False).first()
 
     if user is None:
         flash("User does not exist.")
 
         return redirect(url_for("home"))
 
-    items_per_page = app.config.get("ITEMS_PER_PAGE")
-
-    query = (
-        Log.query.filter_by(user_id=user_id)
-        .order_by(Log.id.desc())
-        .limit(items_per_page)
+    pagination = paginate(
+        Log.query.filter_by(user_id=user_id),
+        [Log.id],
+        page_id,
+        app.config.get("ITEMS_PER_PAGE"),
+        lambda log: (log.id,),
     )
 
-    logs = query.offset(items_per_page * page_id).all()
-
-    not_first_page = page_id > 0
-    not_last_page = (query.offset(items_per_page * page_id + 1).count()) > 0
-
     return render_template(
         "profile.html",
         navbar_items=get_navbar_items(),
         user=user,
-        logs=logs,
-        not_first_page=not_first_page,
-        not_last_page=not_last_page,
+        logs=pagination.items,
+        not_first_page=pagination.not_first_page,
+        not_last_page=pagination.not_last_page,
+        previous_cursor=pagination.previous_cursor,
+        next_cursor=pagination.next_cursor,
         page_id=page_id,
     )
 
@@ -236,27 +250,48 @@ def my_profile(page_id: str):
 
         return redirect(url_for("home"))
 
-    items_per_page = app.config.get("ITEMS_PER_PAGE")
+    pagination = paginate(
+        Log.query.filter_by(user_id=current_user.id),
+        [Log.id],
+        page_id,
+        app.config.get("ITEMS_PER_PAGE"),
+        lambda log: (log.id,),
+    )
 
-    query = (
-        Log.query.filter_by(user_id=current_user.id)
-        .order_by(Log.id.desc())
-        .limit(items_per_page)
+    return render_template(
+        "my-profile.html",
+        navbar_items=get_navbar_items(),
+        user=current_user,
+        rank=get_rank(current_user.id),
+        logs=pagination.items,
+        page_id=page_id,
+        not_first_page=pagination.not_first_page,
+        not_last_page=pagination.not_last_page,
+        previous_cursor=pagination.previous_cursor,
+        next_cursor=pagination.next_cursor,
     )
 
-    logs = query.offset(items_per_page * page_id).all()
 
-    not_first_page = page_id > 0
-    not_last_page = (query.offset(items_per_page * page_id + 1).count()) > 0
+@app.route("/leaderboard/<page_id>/", methods=["GET", "POST"])
+def leaderboard(page_id: str):
+    if page_id.isdigit():
+        page_id = int(page_id)
+    else:
+        flash("Page id is not a number.")
+
+        return redirect(url_for("home"))
+
+    pagination = get_leaderboard(page_id, app.config.get("ITEMS_PER_PAGE"))
 
     return render_template(
-        "my-profile.html",
+        "leaderboard.html",
         navbar_items=get_navbar_items(),
-        user=current_user,
-        logs=logs,
+        users=pagination.items,
         page_id=page_id,
-        not_first_page=not_first_page,
-        not_last_page=not_last_page,
+        not_first_page=pagination.not_first_page,
+        not_last_page=pagination.not_last_page,
+        previous_cursor=pagination.previous_cursor,
+        next_cursor=pagination.next_cursor,
     )
 
 
@@ -284,9 +319,7 @@ def edit_my_profile():
                 user=current_user,
             )
 
-        if checkpw(
-            bytes(current_password, "utf-8"), bytes(current_user.password, "utf-8")
-        ):
+        if check_password(current_password, current_user.password):
             email: str or None = request.form.get("email")
 
             if email != "" and email is not None:
@@ -309,9 +342,7 @@ def edit_my_profile():
                     )
                     current_user.verified = False
 
-                    send_confirmation_email_task.delay(
-                        current_user.email, current_user.token
-                    )
+                    queue_confirmation_email(current_user.email, current_user.token)
 
                     flash("Confirmation email is being sent.")
                 else:
@@ -327,9 +358,7 @@ def edit_my_profile():
                 confirm_password: str or None = request.form.get("confirm_password")
 
                 if verify_password_quiet(password, confirm_password):
-                    current_user.password = hashpw(
-                        bytes(password, "utf-8"), gensalt()
-                    ).decode("utf-8")
+                    current_user.password = hash_password(password)
                 else:
                     return render_template(
                         "edit-my-profile.html",
@@ -359,7 +388,7 @@ def verify_account():
     current_user.token = token_urlsafe(app.config.get("TOKEN_NUM_BYTES"))
     db.session.commit()
 
-    send_confirmation_email(current_user.email, current_user.token)
+    queue_confirmation_email(current_user.email, current_user.token)
 
     flash("Confirmation is being email sent.")
 
@@ -372,16 +401,20 @@ def delete_account():
     if request.method == "POST":
         password: str or None = request.form.get("password")
 
-        if checkpw(bytes(password, "utf-8"), bytes(current_user.password, "utf-8")):
-            User.query.filter_by(id=current_user.id).delete()
+        if check_password(password, current_user.password):
+            user_id = current_user.id
 
-            for u in User.qeury.filter(User.id > current_user.id):
-                u.id -= 1
+            current_user.deleted = True
+            current_user.email = None
+            current_user.password = ""
+            current_user.token = ""
 
             logout_user()
 
             db.session.commit()
 
+            remove_rank(user_id)
+
             flash("Your account has been deleted.")
 
             return redirect(url_for("home"))
@@ -0,0 +1,113 @@
+import math
+import time
+from functools import wraps
+from threading import Lock
+
+from cachetools import TTLCache
+from flask import request
+from flask_login import current_user
+from redis.exceptions import RedisError
+
+from .app import app
+from .redis_client import redis_client
+
+RATE_LIMIT_KEY = "wiki:rate-limit"
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = {}
+local wait = 0
+
+for i, key in ipairs(KEYS) do
+    local bucket = redis.call("HMGET", key, "tokens", "updated")
+    local available = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+
+    available = math.min(capacity, available + math.max(0, now - updated) * rate)
+    tokens[i] = available
+
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+
+if wait > 0 then
+    return tostring(wait)
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call("HSET", key, "tokens", tostring(tokens[i] - 1), "updated", tostring(now))
+    redis.call("EXPIRE", key, math.ceil(capacity / rate) + 1)
+end
+
+return "0"
+"""
+
+take_tokens = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+fallback_lock = Lock()
+fallback_buckets = {}
+
+
+def take_fallback_tokens(keys: list, capacity: float, rate: float, now: float) -> float:
+    with fallback_lock:
+        buckets = fallback_buckets.get((capacity, rate))
+
+        if buckets is None:
+            buckets = fallback_buckets[(capacity, rate)] = TTLCache(
+                app.config.get("RATE_LIMIT_FALLBACK_SIZE"), math.ceil(capacity / rate) + 1
+            )
+
+        tokens = []
+
+        for key in keys:
+            available, updated = buckets.get(key, (capacity, now))
+            tokens.append(min(capacity, available + max(0.0, now - updated) * rate))
+
+        wait = max((1 - available) / rate for available in tokens)
+
+        if wait > 0:
+            return wait
+
+        for key, available in zip(keys, tokens):
+            buckets[key] = (available - 1, now)
+
+        return 0.0
+
+
+def rate_limit_wait(endpoint: str, limit: dict) -> float:
+    keys = [f"{RATE_LIMIT_KEY}:{endpoint}:ip:{request.remote_addr}"]
+
+    if current_user.is_authenticated:
+        keys.append(f"{RATE_LIMIT_KEY}:{endpoint}:user:{current_user.id}")
+
+    capacity = limit.get("CAPACITY")
+    rate = limit.get("PER_MINUTE") / 60
+    now = time.time()
+
+    try:
+        return float(take_tokens(keys=keys, args=[capacity, rate, now]))
+    except RedisError:
+        return take_fallback_tokens(keys, capacity, rate, now)
+
+
+def rate_limited(view):
+    @wraps(view)
+    def limited_view(*args, **kwargs):
+        limit = app.config.get("RATE_LIMITS").get(request.endpoint)
+
+        if limit is not None and request.method in limit.get(
+            "METHODS", ["GET", "POST"]
+        ):
+            wait = rate_limit_wait(request.endpoint, limit)
+
+            if wait > 0:
+                return (
+                    "Too many requests, please try again later.",
+                    429,
+                    {"Retry-After": str(math.ceil(wait))},
+                )
+
+        return view(*args, **kwargs)
+
+    return limited_view
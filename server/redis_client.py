@@ -0,0 +1,5 @@
+from redis import Redis
+
+from .app import app
+
+redis_client = Redis.from_url(app.config.get("REDIS_URL"))
@@ -0,0 +1,118 @@
+from .app import app
+from .delta import (
+    apply_delta,
+    decode_delta,
+    decode_snapshot,
+    encode_delta,
+    encode_snapshot,
+    make_delta,
+)
+from .models import Log, Page, Revision, db
+from .schema import upgrade_schema
+
+
+def encode_revision(number: int, old_content: str or None, content: str) -> tuple:
+    if old_content is None or number % app.config.get("REVISION_SNAPSHOT_INTERVAL") == 0:
+        return True, encode_snapshot(content)
+
+    return False, encode_delta(make_delta(old_content, content))
+
+
+def add_revision(page_id: int, number: int, old_content: str or None, content: str):
+    db.session.add(
+        Revision(page_id, number, *encode_revision(number, old_content, content))
+    )
+
+
+def get_revision(page_id: int, number: int) -> str or None:
+    snapshot = (
+        Revision.query.filter(
+            Revision.page_id == page_id,
+            Revision.number <= number,
+            Revision.snapshot.is_(True),
+        )
+        .order_by(Revision.number.desc())
+        .first()
+    )
+
+    if snapshot is None:
+        return None
+
+    content = decode_snapshot(snapshot.data)
+
+    deltas = Revision.query.filter(
+        Revision.page_id == page_id,
+        Revision.number > snapshot.number,
+        Revision.number <= number,
+    ).order_by(Revision.number)
+
+    for delta in deltas:
+        content = apply_delta(content, decode_delta(delta.data))
+
+    return content
+
+
+def get_log_contents(log: Log) -> tuple:
+    if log.old_revision is None or log.new_revision is None:
+        return log.legacy_old_content, log.legacy_new_content
+
+    return (
+        get_revision(log.page_id, log.old_revision),
+        get_revision(log.page_id, log.new_revision),
+    )
+
+
+def migrate_page_revisions(page_id: int):
+    page = Page.query.filter_by(id=page_id).first()
+    logs = Log.query.filter_by(page_id=page_id).order_by(Log.id).all()
+
+    number = 0
+    content = logs[0].legacy_old_content if logs else page.content
+
+    add_revision(page_id, number, None, content)
+
+    for log in logs:
+        if log.legacy_old_content != content:
+            number += 1
+            add_revision(page_id, number, content, log.legacy_old_content)
+            content = log.legacy_old_content
+
+        log.old_revision = number
+
+        if log.legacy_new_content != content:
+            number += 1
+            add_revision(page_id, number, content, log.legacy_new_content)
+            content = log.legacy_new_content
+
+        log.new_revision = number
+        log.legacy_old_content = ""
+        log.legacy_new_content = ""
+
+    if page is not None:
+        if page.content != content:
+            number += 1
+            add_revision(page_id, number, content, page.content)
+
+        page.revision = number
+
+    db.session.commit()
+
+
+@app.cli.command("migrate-revisions")
+def migrate_revisions_command():
+    upgrade_schema()
+
+    page_ids = {page_id for (page_id,) in db.session.query(Page.id)}
+    page_ids.update(page_id for (page_id,) in db.session.query(Log.page_id).distinct())
+
+    migrated = 0
+
+    for page_id in sorted(page_ids):
+        if Revision.query.filter_by(page_id=page_id).first() is not None:
+            continue
+
+        migrate_page_revisions(page_id)
+
+        migrated += 1
+
+    print(f"Migrated the history of {migrated} pages.")
@@ -0,0 +1,2 @@
+def sanitize_content(content: str) -> str:
+    return content.replace("<script>", "").replace("</script>", "")
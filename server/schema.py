@@ -0,0 +1,245 @@
+import re
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+
+from .app import app
+from .leaderboard import (
+    count_higher_scores,
+    count_ranked_before,
+    get_database_leaderboard,
+)
+from .models import Log, Message, SchemaVersion, db
+from .paginate import paginate
+from .search_index import search_pages
+
+FULL_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)$|Seq Scan on (\w+)")
+WHERE_RE = re.compile(r"\bWHERE\b")
+LAST_CURSOR = 2 ** 31 - 1
+
+
+def add_column(table: str, column: str, definition: str):
+    inspector = inspect(db.session.connection())
+
+    if not inspector.has_table(table):
+        return
+
+    if column in {existing["name"] for existing in inspector.get_columns(table)}:
+        return
+
+    preparer = db.engine.dialect.identifier_preparer
+    false = str(db.false().compile(dialect=db.engine.dialect))
+
+    db.session.execute(
+        text(
+            f"ALTER TABLE {preparer.quote(table)} "
+            f"ADD COLUMN {preparer.quote(column)} {definition.format(false=false)}"
+        )
+    )
+
+
+def add_revision_and_soft_delete_columns():
+    add_column("page", "revision", "INTEGER DEFAULT '0' NOT NULL")
+    add_column("page", "deleted", "BOOLEAN DEFAULT {false} NOT NULL")
+    add_column("page", "updated_at", "TIMESTAMP")
+    add_column("user", "deleted", "BOOLEAN DEFAULT {false} NOT NULL")
+    add_column("message", "deleted", "BOOLEAN DEFAULT {false} NOT NULL")
+    add_column("log", "old_revision", "INTEGER")
+    add_column("log", "new_revision", "INTEGER")
+
+
+def create_missing_indexes():
+    connection = db.session.connection()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def sync_id_sequences():
+    if db.engine.dialect.name != "postgresql":
+        return
+
+    preparer = db.engine.dialect.identifier_preparer
+
+    for table in db.metadata.sorted_tables:
+        if "id" not in table.columns or not table.c.id.primary_key:
+            continue
+
+        name = preparer.format_table(table)
+
+        db.session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                f"COALESCE(MAX(id), 0) + 1, false) FROM {name}"
+            ),
+            {"table": name},
+        )
+
+
+MIGRATIONS = [
+    (
+        "Add revision, soft delete and timestamp columns",
+        add_revision_and_soft_delete_columns,
+    ),
+    ("Move id allocation to the database", sync_id_sequences),
+    ("Add indexes for log, message and search list views", create_missing_indexes),
+    ("Add an index for leaderboard ranks", create_missing_indexes),
+]
+
+
+def schema_version() -> int:
+    return db.session.query(db.func.max(SchemaVersion.version)).scalar() or 0
+
+
+def upgrade_schema() -> list:
+    db.create_all()
+
+    current = schema_version()
+    applied = []
+
+    for version, (description, migration) in enumerate(MIGRATIONS, 1):
+        if version <= current:
+            continue
+
+        migration()
+
+        db.session.add(SchemaVersion(version, description))
+        db.session.commit()
+
+        applied.append((version, description))
+
+    return applied
+
+
+@app.cli.command("upgrade-schema")
+def upgrade_schema_command():
+    for version, description in upgrade_schema():
+        print(f"Applied migration {version}: {description}")
+
+    print(f"Schema is up to date at version {schema_version()}.")
+
+
+def list_views() -> dict:
+    items_per_page = app.config.get("ITEMS_PER_PAGE")
+
+    def logs():
+        paginate(Log.query, [Log.id], 0, items_per_page, lambda log: (log.id,))
+
+    def profile():
+        paginate(
+            Log.query.filter_by(user_id=1),
+            [Log.id],
+            0,
+            items_per_page,
+            lambda log: (log.id,),
+        )
+
+    def dashboard():
+        paginate(
+            Message.query.filter_by(deleted=False),
+            [Message.id],
+            0,
+            items_per_page,
+            lambda message: (message.id,),
+        )
+
+    def leaderboard():
+        get_database_leaderboard(0, items_per_page)
+
+    def rank():
+        count_higher_scores(0)
+        count_ranked_before(0, 0)
+
+    def search():
+        search_pages("wiki", 0, items_per_page)
+
+    def search_terms():
+        search_pages("wiki page", 0, items_per_page)
+
+    return {
+        "logs": (logs, [LAST_CURSOR]),
+        "profile": (profile, [LAST_CURSOR]),
+        "dashboard": (dashboard, [LAST_CURSOR]),
+        "leaderboard": (leaderboard, [LAST_CURSOR, LAST_CURSOR]),
+        "rank": (rank, [LAST_CURSOR]),
+        "search": (search, [LAST_CURSOR, LAST_CURSOR]),
+        "search (several terms)": (search_terms, [LAST_CURSOR, LAST_CURSOR]),
+    }
+
+
+def capture_statements(view) -> list:
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", capture)
+
+    try:
+        view()
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+        db.session.rollback()
+
+    return statements
+
+
+def explain(statement: str, parameters) -> list:
+    connection = db.session.connection()
+
+    if db.engine.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+
+        return [row[-1] for row in rows]
+
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+
+    return [row[0] for row in rows]
+
+
+def full_scans(statement: str, plan: list) -> list:
+    tables = set(db.metadata.tables)
+    scans = []
+
+    for line in plan:
+        match = FULL_SCAN_RE.search(line.strip())
+
+        if match is None or (match.group(1) or match.group(2)) not in tables:
+            continue
+
+        if match.group(1) and not WHERE_RE.search(statement):
+            continue
+
+        scans.append(line.strip())
+
+    return scans
+
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    failures = 0
+
+    for name, (view, cursor) in list_views().items():
+        for arguments in ["", f"?after={'.'.join(str(value) for value in cursor)}"]:
+            with app.test_request_context(f"/{arguments}"):
+                for statement, parameters in capture_statements(view):
+                    plan = explain(statement, parameters)
+                    scans = full_scans(statement, plan)
+                    db.session.rollback()
+
+                    print(f"{'FAIL' if scans else 'ok':<4} {name} {arguments}")
+
+                    for line in plan:
+                        print(f"       {line}")
+
+                    failures += bool(scans)
+
+    if failures:
+        print(f"{failures} queries scan a whole table.")
+
+        raise SystemExit(1)
+
+    print("Every list view query uses an index.")
@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+from html import unescape
+
+from sqlalchemy import func
+
+from .app import app
+from .models import Page, SearchPosting, db
+from .paginate import Pagination, paginate
+
+WORD_RE = re.compile(r"\w+")
+TAG_RE = re.compile(r"<[^>]*>")
+TITLE_WEIGHT = 10
+MAX_CONTENT_WEIGHT = 5
+MAX_TERM_LENGTH = 64
+MAX_SEARCH_TERMS = 8
+MAX_DOCUMENT_FREQUENCY = 10000
+
+
+def tokenize(text: str) -> list:
+    return [
+        word.casefold()
+        for word in WORD_RE.findall(text)
+        if len(word) <= MAX_TERM_LENGTH
+    ]
+
+
+def term_weights(title: str, content: str) -> Counter:
+    weights = Counter()
+
+    for term, count in Counter(tokenize(unescape(TAG_RE.sub(" ", content)))).items():
+        weights[term] += min(count, MAX_CONTENT_WEIGHT)
+
+    for term in set(tokenize(title)):
+        weights[term] += TITLE_WEIGHT
+
+    return weights
+
+
+def posting_rows(page_id: int, title: str, content: str) -> list:
+    return [
+        {"term": term, "page_id": page_id, "weight": weight}
+        for term, weight in term_weights(title, content).items()
+    ]
+
+
+def insert_postings(rows: list):
+    if rows:
+        db.session.execute(SearchPosting.__table__.insert(), rows)
+
+
+def remove_page(page_id: int):
+    SearchPosting.query.filter_by(page_id=page_id).delete()
+
+
+def index_page(page: Page):
+    remove_page(page.id)
+
+    insert_postings(posting_rows(page.id, page.title, page.content))
+
+
+def document_frequency(term: str) -> int:
+    postings = (
+        db.session.query(SearchPosting.page_id)
+        .filter(SearchPosting.term == term)
+        .limit(MAX_DOCUMENT_FREQUENCY)
+        .subquery()
+    )
+
+    return db.session.query(func.count()).select_from(postings).scalar()
+
+
+def search_pages(search: str, page_id: int, items_per_page: int) -> Pagination:
+    terms = list(dict.fromkeys(tokenize(search)))[:MAX_SEARCH_TERMS]
+
+    if not terms:
+        return Pagination([], page_id > 0, False, None, None)
+
+    if len(terms) == 1:
+        score = SearchPosting.weight
+
+        query = db.session.query(SearchPosting.page_id, score.label("score")).filter(
+            SearchPosting.term == terms[0]
+        )
+    else:
+        score = func.sum(SearchPosting.weight)
+
+        rarest = min(terms, key=document_frequency)
+        candidates = db.session.query(SearchPosting.page_id).filter(
+            SearchPosting.term == rarest
+        )
+
+        query = (
+            db.session.query(SearchPosting.page_id, score.label("score"))
+            .filter(
+                SearchPosting.term.in_(terms),
+                SearchPosting.page_id.in_(candidates),
+            )
+            .group_by(SearchPosting.page_id)
+            .having(func.count() == len(terms))
+        )
+
+    pagination = paginate(
+        query,
+        [score, SearchPosting.page_id],
+        page_id,
+        items_per_page,
+        lambda row: (row.score, row.page_id),
+        grouped=len(terms) > 1,
+    )
+
+    page_ids = [row.page_id for row in pagination.items]
+    pages = {
+        page.id: page
+        for page in Page.query.filter(Page.id.in_(page_ids), Page.deleted.is_(False))
+    }
+
+    return pagination._replace(items=[pages[i] for i in page_ids if i in pages])
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    SearchPosting.query.delete()
+
+    indexed = 0
+    rows = []
+
+    pages = (
+        db.session.query(Page.id, Page.title, Page.content)
+        .filter(Page.deleted.is_(False))
+        .yield_per(500)
+    )
+
+    for page_id, title, content in pages:
+        rows.extend(posting_rows(page_id, title, content))
+
+        indexed += 1
+
+        if len(rows) >= 10000:
+            insert_postings(rows)
+
+            rows = []
+
+    insert_postings(rows)
+
+    db.session.commit()
+
+    print(f"Indexed {indexed} pages.")
@@ -1,11 +1,62 @@
+import os
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from smtplib import SMTP_SSL
+from smtplib import SMTP, SMTP_SSL, SMTPException, SMTPServerDisconnected
 
 from .app import app
 
+connection = {"pid": None, "server": None, "last_used": 0.0}
 
-def send_confirmation_email(email: str, token: str):
+
+def open_smtp_connection() -> SMTP:
+    host = app.config.get("EMAIL_SMTP_HOST")
+    port = app.config.get("EMAIL_SMTP_PORT")
+    timeout = app.config.get("EMAIL_SMTP_TIMEOUT")
+
+    if app.config.get("EMAIL_SMTP_SSL"):
+        server = SMTP_SSL(host, port, timeout=timeout)
+    else:
+        server = SMTP(host, port, timeout=timeout)
+
+    if app.config.get("EMAIL_PASSWORD"):
+        server.login(app.config.get("EMAIL_ADDRESS"), app.config.get("EMAIL_PASSWORD"))
+
+    return server
+
+
+def close_smtp_connection():
+    server = connection["server"]
+
+    connection["server"] = None
+
+    if server is not None:
+        try:
+            server.quit()
+        except (SMTPException, OSError):
+            server.close()
+
+
+def get_smtp_connection() -> SMTP:
+    idle = time.monotonic() - connection["last_used"]
+
+    if connection["pid"] != os.getpid():
+        connection["pid"] = os.getpid()
+        connection["server"] = None
+    elif connection["server"] is not None and idle > app.config.get(
+        "EMAIL_SMTP_IDLE_TIMEOUT"
+    ):
+        close_smtp_connection()
+
+    if connection["server"] is None:
+        connection["server"] = open_smtp_connection()
+
+    connection["last_used"] = time.monotonic()
+
+    return connection["server"]
+
+
+def build_confirmation_email(email: str, token: str) -> MIMEMultipart:
     server_transport_protocol = app.config.get("SERVER_TRANSFER_PROTOCOL")
     server_address = app.config.get("SERVER_ADDRESS")
     server_port = app.config.get("SERVER_PORT")
@@ -13,9 +64,6 @@ def send_confirmation_email(email: str, token: str):
     content_plain = f"{server_transport_protocol}://{server_address}:{server_port}/confirm-email/{token}/"
     content_html = f"<p>{server_transport_protocol}://{server_address}:{server_port}/confirm-email/{token}/</p>"
 
-    server = SMTP_SSL("smtp.gmail.com")
-    server.login(app.config.get("EMAIL_ADDRESS"), app.config.get("EMAIL_PASSWORD"))
-
     content = MIMEMultipart("alternative")
 
     content["From"] = app.config.get("EMAIL_ADDRESS")
@@ -27,6 +75,17 @@ def send_confirmation_email(email: str, token: str):
     content.attach(MIMEText(content_plain, "plain"))
     content.attach(MIMEText(content_html, "html"))
 
-    server.sendmail(app.config.get("EMAIL_ADDRESS"), email, content.as_string())
+    return content
 
-    server.quit()
+
+def send_message(email: str, content: str):
+    try:
+        get_smtp_connection().sendmail(app.config.get("EMAIL_ADDRESS"), email, content)
+    except SMTPServerDisconnected:
+        close_smtp_connection()
+
+        get_smtp_connection().sendmail(app.config.get("EMAIL_ADDRESS"), email, content)
+
+
+def send_confirmation_email(email: str, token: str):
+    send_message(email, build_confirmation_email(email, token).as_string())
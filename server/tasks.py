@@ -1,7 +1,126 @@
-from .send_confirmation_email import send_confirmation_email
+import json
+from smtplib import (
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPSenderRefused,
+)
+
+from .app import app
+from .redis_client import redis_client
+from .send_confirmation_email import (
+    build_confirmation_email,
+    close_smtp_connection,
+    send_message,
+)
 from .worker import worker
 
+EMAIL_QUEUE_KEY = "wiki:confirmation-emails"
+EMAIL_FLUSH_KEY = "wiki:confirmation-emails:flush-scheduled"
+EMAIL_PROCESSING_KEY = "wiki:confirmation-emails:processing"
+TAKE_EMAILS_SCRIPT = """
+local items = redis.call("LRANGE", KEYS[1], 0, tonumber(ARGV[1]) - 1)
+
+if #items > 0 then
+    redis.call("LTRIM", KEYS[1], #items, -1)
+
+    for _, item in ipairs(items) do
+        redis.call("RPUSH", KEYS[2], item)
+    end
+end
+
+return items
+"""
+REQUEUE_EMAILS_SCRIPT = """
+local items = redis.call("LRANGE", KEYS[2], 0, -1)
+
+for i = #items, 1, -1 do
+    redis.call("LPUSH", KEYS[1], items[i])
+end
+
+redis.call("DEL", KEYS[2])
+"""
+
+take_emails_script = redis_client.register_script(TAKE_EMAILS_SCRIPT)
+requeue_emails_script = redis_client.register_script(REQUEUE_EMAILS_SCRIPT)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    if isinstance(error, SMTPRecipientsRefused):
+        return True
+
+    if isinstance(error, (SMTPSenderRefused, SMTPResponseException)):
+        return 500 <= error.smtp_code < 600
+
+    return False
+
+
+def queue_confirmation_email(email: str, token: str):
+    redis_client.rpush(EMAIL_QUEUE_KEY, json.dumps([email, token]))
+
+    schedule_flush(app.config.get("EMAIL_BATCH_DELAY"))
+
+
+def schedule_flush(countdown: int):
+    if redis_client.set(
+        EMAIL_FLUSH_KEY, 1, nx=True, ex=app.config.get("EMAIL_FLUSH_TIMEOUT")
+    ):
+        flush_confirmation_emails_task.apply_async(countdown=countdown)
+
+
+def take_confirmation_emails(processing: str, count: int) -> list:
+    return take_emails_script(keys=[EMAIL_QUEUE_KEY, processing], args=[count])
+
+
+def requeue_confirmation_emails(processing: str):
+    requeue_emails_script(keys=[EMAIL_QUEUE_KEY, processing])
+
+    schedule_flush(app.config.get("EMAIL_RETRY_BACKOFF_MAX"))
+
+
+@worker.task(
+    bind=True, acks_late=True, max_retries=app.config.get("EMAIL_MAX_RETRIES")
+)
+def flush_confirmation_emails_task(self):
+    redis_client.delete(EMAIL_FLUSH_KEY)
+
+    processing = f"{EMAIL_PROCESSING_KEY}:{self.request.id}"
+    batch_size = app.config.get("EMAIL_BATCH_SIZE")
+
+    while True:
+        batch = redis_client.lrange(processing, 0, -1) or take_confirmation_emails(
+            processing, batch_size
+        )
+
+        if not batch:
+            return
+
+        for item in batch:
+            email, token = json.loads(item)
+
+            try:
+                send_message(email, build_confirmation_email(email, token).as_string())
+            except (SMTPException, OSError) as error:
+                if not is_permanent_failure(error):
+                    close_smtp_connection()
+
+                    if self.request.retries >= self.max_retries:
+                        requeue_confirmation_emails(processing)
+
+                        raise
+
+                    raise self.retry(
+                        exc=error,
+                        countdown=min(
+                            app.config.get("EMAIL_RETRY_BACKOFF")
+                            * 2 ** self.request.retries,
+                            app.config.get("EMAIL_RETRY_BACKOFF_MAX"),
+                        ),
+                    )
+
+            redis_client.lrem(processing, 1, item)
+
 
 @worker.task
 def send_confirmation_email_task(email: str, token: str):
-    send_confirmation_email(email, token)
+    queue_confirmation_email(email, token)
@@ -0,0 +1,84 @@
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from .app import app
+from .broadcast import broadcast, on_broadcast, start_listener
+from .models import Page, db
+
+title_lock = Lock()
+titles = {"entries": None}
+
+
+def title_entry(page_id: int, title: str) -> tuple:
+    return title.casefold(), title, page_id
+
+
+def load_titles():
+    entries = sorted(
+        title_entry(page_id, title)
+        for page_id, title in db.session.query(Page.id, Page.title).filter(
+            Page.deleted.is_(False)
+        )
+    )
+
+    with title_lock:
+        titles["entries"] = entries
+
+
+def reload_titles():
+    with app.app_context():
+        try:
+            load_titles()
+        except SQLAlchemyError:
+            with title_lock:
+                titles["entries"] = None
+
+
+def apply_title_change(change: dict):
+    entry = title_entry(change["id"], change["title"])
+
+    with title_lock:
+        entries = titles["entries"]
+
+        if entries is None:
+            return
+
+        index = bisect_left(entries, entry)
+        present = index < len(entries) and entries[index] == entry
+
+        if change["deleted"] and present:
+            del entries[index]
+        elif not change["deleted"] and not present:
+            entries.insert(index, entry)
+
+
+on_broadcast("titles", apply_title_change, reload_titles)
+
+
+def update_title(page: Page):
+    broadcast("titles", {"id": page.id, "title": page.title, "deleted": page.deleted})
+
+
+def suggest_titles(prefix: str, limit: int) -> list:
+    start_listener()
+
+    if titles["entries"] is None:
+        load_titles()
+
+    key = prefix.casefold()
+
+    if not key:
+        return []
+
+    with title_lock:
+        entries = titles["entries"]
+        index = bisect_left(entries, (key,))
+        matches = entries[index : index + limit]
+
+    return [
+        (page_id, title)
+        for entry_key, title, page_id in matches
+        if entry_key.startswith(key)
+    ]
@@ -0,0 +1,103 @@
+import os
+import re
+import time
+from hashlib import sha256
+from os import path
+from tempfile import NamedTemporaryFile
+
+from .app import app
+from .export import export_rows, revision_records
+from .models import Log, Page, db
+
+UPLOAD_DIRECTORY = "static"
+UPLOAD_NAME_RE = re.compile(r"[0-9a-f]{64}\.[a-z]+")
+UPLOAD_REFERENCE_RE = re.compile(r"/static/([0-9a-f]{64}\.[a-z]+)")
+EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def write_stream(stream, file) -> str:
+    digest = sha256()
+    size = 0
+    chunk_size = app.config.get("UPLOAD_CHUNK_SIZE")
+
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        size += len(chunk)
+
+        if size > app.config.get("UPLOAD_MAX_BYTES"):
+            raise UploadTooLarge()
+
+        digest.update(chunk)
+        file.write(chunk)
+
+    return digest.hexdigest()
+
+
+def store_upload(stream, extension: str) -> str:
+    extension = EXTENSION_ALIASES.get(extension, extension)
+
+    os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+
+    with NamedTemporaryFile(dir=UPLOAD_DIRECTORY, delete=False) as temporary:
+        try:
+            digest = write_stream(stream, temporary)
+        except UploadTooLarge:
+            os.remove(temporary.name)
+
+            raise
+
+    location = path.join(UPLOAD_DIRECTORY, f"{digest}.{extension}")
+
+    if path.exists(location):
+        os.remove(temporary.name)
+        os.utime(location)
+    else:
+        os.replace(temporary.name, location)
+
+    return location
+
+
+def referenced_uploads() -> set:
+    referenced = set()
+
+    for (content,) in db.session.query(Page.content).yield_per(500):
+        referenced.update(UPLOAD_REFERENCE_RE.findall(content))
+
+    for revision in revision_records(export_rows("revisions", 0)):
+        referenced.update(UPLOAD_REFERENCE_RE.findall(revision["content"] or ""))
+
+    for old_content, new_content in db.session.query(
+        Log.legacy_old_content, Log.legacy_new_content
+    ).yield_per(500):
+        referenced.update(UPLOAD_REFERENCE_RE.findall(old_content))
+        referenced.update(UPLOAD_REFERENCE_RE.findall(new_content))
+
+    return referenced
+
+
+@app.cli.command("gc-uploads")
+def gc_uploads_command():
+    referenced = referenced_uploads()
+    cutoff = time.time() - app.config.get("UPLOAD_GC_MIN_AGE")
+
+    removed = 0
+    freed = 0
+
+    for entry in os.scandir(UPLOAD_DIRECTORY):
+        if not UPLOAD_NAME_RE.fullmatch(entry.name) or entry.name in referenced:
+            continue
+
+        stat = entry.stat()
+
+        if stat.st_mtime > cutoff:
+            continue
+
+        os.remove(entry.path)
+
+        removed += 1
+        freed += stat.st_size
+
+    print(f"Removed {removed} unreferenced uploads ({freed} bytes).")
@@ -1,14 +1,15 @@
 import re
 from secrets import token_urlsafe
 
-from bcrypt import gensalt, hashpw
 from flask import Request, Response, flash, redirect, render_template, url_for
 from flask_login import login_user
 
 from .app import app
 from .get_navbar_items import get_navbar_items
+from .leaderboard import update_rank
 from .models import User, db
-from .tasks import send_confirmation_email_task
+from .passwords import hash_password
+from .tasks import queue_confirmation_email
 
 EMAIL_RE = re.compile(
     """(?:[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*|"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*")@(?:(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?|\[(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?|[a-z0-9-]*[a-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\])"""
@@ -99,16 +100,17 @@ def verify_request(request: Request) -> Response or str:
                 token = token_urlsafe(app.config.get("TOKEN_NUM_BYTES"))
 
                 user = User(
-                    User.query.count(),
                     email,
                     username,
-                    hashpw(bytes(password, "utf-8"), gensalt()).decode("utf-8"),
+                    hash_password(password),
                     token,
                 )
                 db.session.add(user)
                 db.session.commit()
 
-                send_confirmation_email_task.delay(email, token)
+                update_rank(user)
+
+                queue_confirmation_email(email, token)
 
                 flash("Confirmation email is being sent.")
 
@@ -0,0 +1,6 @@
+from .app import app
+
+
+def warm_templates():
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
@@ -2,5 +2,9 @@ from celery import Celery
 
 from .app import app
 
-worker = Celery(app.name, broker="redis://127.0.0.1:6379/0")
+worker = Celery(
+    app.name,
+    broker=app.config.get("REDIS_URL"),
+    include=["server.tasks", "server.events", "server.leaderboard"],
+)
 worker.conf.update(app.config)